@@ -1,55 +1,73 @@
 from __future__ import print_function # stderr
 
 import networkx as nx                 # graph library
+import numpy as np
 import binomial_heap as bh            # Binomial heap implementation
 import dary_heap as dh                # D-ary heap implementation
 import fib_heap as fh                 # Fibonacci heap implementation
+import pairing_heap as ph             # Pairing heap implementation
+import bucket_queue as bq             # Dial's buckets and radix heap
 import disjoint_set as ds             # Disjoint set implementation
+import boruvka                        # Boruvka's algorithm (NumPy rounds)
+from csr_graph import CSRGraph        # Compact graph representation
+from mst_result import MSTBuilder, MSTResult # Array-backed MST result
+import graph_io                       # .edgelist loader with binary cache
+import mst_registry                   # Registry of the tested MST methods
+import result_store                   # Persistent store of the test results
 import time                           # Time functions
+import timing                         # Measurement of the tests
+import multiprocessing                # Process pool for the tests
+import signal                         # Time limit of the tests
 import glob
+import heapq
 import os
 import sys
 import process_results as pr
 from argparse import ArgumentParser   # Command line argument parser
+from collections import OrderedDict
+from functools import partial
 
 def kruskal(graph, edges=[], sort=False):
     """ Kruskal's algorithm for finding a minimum spanning tree. Implements
     the solution presented at Brassard's `Fundamentals of Algorithms' book. """
     
-    mst = [] # list of edges that form the minimum spanning tree
+    mst = MSTBuilder() # edges that form the minimum spanning tree
     n = nx.number_of_nodes(graph)
 
     # list of all the edges in graph, sorted by increasing lenght
     if not edges:
-        edges = graph.edges(data=True)        
+        edges = list(graph.edges(data=True))
         if sort:
-            edges.sort(key=lambda edge: edge[2]['weight'])
+            with timing.phase("sort"):
+                edges.sort(key=lambda edge: edge[2]['weight'])
 
     # Initialize n sets, each containing a different element of N
-    uf = ds.DisjointSets(graph.nodes())
+    uf = ds.ArrayDisjointSets(graph.nodes())
     
     while_count = 0
     if_count = 0
 
-    # greedy loop
-    tn = 0   # number of edges in the set
-    en = 0
-    while tn < n - 1:
-        while_count += 1
-        e = edges[en]
-        en += 1
-        u = uf.find(e[0])
-        v = uf.find(e[1])
-
-        if u != v:
-            if_count += 1
-            mst.append(e)
-            tn += 1
-            uf.merge(u, v)
+    with timing.phase("greedy"):
+        # greedy loop
+        tn = 0   # number of edges in the set
+        en = 0
+        while tn < n - 1 and en < len(edges):
+            while_count += 1
+            e = edges[en]
+            en += 1
+            u = uf.find(e[0])
+            v = uf.find(e[1])
+
+            if u != v:
+                if_count += 1
+                mst.append(e[0], e[1], e[2]['weight'])
+                tn += 1
+                uf.merge(u, v)
 
-    #print(while_count, if_count, if_count/while_count)
+    # edges examined by the greedy loop
+    timing.record("examined", while_count)
 
-    return mst
+    return mst.result()
 
 
 def prim(graph):
@@ -57,36 +75,83 @@ def prim(graph):
     Brassard's `Fundamentals of Algorithms' pseudocode, using lists. """
     
     # Obtiene matriz de adyacencia con <inf> en nodos no conectados.
-    mx = nx.adjacency_matrix(graph).toarray()
-    mx[mx == 0] = 64000                           # Reemplaza ceros por <inf>
+    csr = CSRGraph.from_networkx(graph)
+    mx, inf = csr.to_dense()
+    nodes = csr.labels
     n = nx.number_of_nodes(graph)                 # Número de nodos del grafo.
     
-    mst = []
+    mst = MSTBuilder()
 
     nearest = [0] * (n + 1)
-    mindist = mx[:,0]
+    mindist = mx[:,0].copy()
 
-    # greedy loop
-    for _ in range(n - 1):
-        mini = 64000
+    with timing.phase("greedy"):
+        # greedy loop
+        for _ in range(n - 1):
+            mini = inf
+            k = -1
 
-        # minimum edge search
-        for j in range(1, n):
-            if 0 <= mindist[j] and mindist[j] < mini:
-                mini = mindist[j]
-                k = j
+            # minimum edge search
+            for j in range(1, n):
+                if 0 <= mindist[j] and mindist[j] < mini:
+                    mini = mindist[j]
+                    k = j
+            if k < 0:
+                break # graph not connected
 
-        mst.append((nearest[k]+1, k+1, graph.get_edge_data(nearest[k]+1, k+1)))
-        mindist[k] = -1
+            mst.append(nearest[k], k, graph[nodes[nearest[k]]][nodes[k]]['weight'])
+            mindist[k] = -1
 
-        for j in range(1, n):
-            if mx[j,k] < mindist[j]:
-                mindist[j] = mx[j, k]
-                nearest[j] = k
+            for j in range(1, n):
+                if mx[j,k] < mindist[j]:
+                    mindist[j] = mx[j, k]
+                    nearest[j] = k
+    timing.record("examined", len(mst) * (n - 1))
 
-    return mst
+    return mst.result(nodes)
     
 
+def prim_dense(graph):
+    """ Prim's algorithm for dense graphs. Same greedy loop as prim, but the
+    minimum edge search and the mindist/nearest update are whole-row NumPy
+    operations, so each of the n iterations costs a few vector calls. """
+    csr = CSRGraph.from_networkx(graph)
+    mx, inf = csr.to_dense()
+    nodes = csr.labels
+    n = csr.n
+
+    mst = MSTBuilder()
+
+    nearest = np.zeros(n, dtype=np.int32)
+    mindist = mx[0].copy()
+    pending = np.ones(n, dtype=bool)  # nodes not yet in the tree
+    pending[0] = False
+    mindist[0] = inf
+    closer = np.empty(n, dtype=bool)
+
+    with timing.phase("greedy"):
+        # greedy loop
+        for _ in range(n - 1):
+            # minimum edge search
+            k = int(mindist.argmin())
+            if mindist[k] == inf:
+                break # graph not connected
+
+            mst.append(nearest[k], k, mindist[k].item())
+            pending[k] = False
+            mindist[k] = inf
+
+            # nodes closer to k than to the tree
+            row = mx[k]
+            np.less(row, mindist, out=closer)
+            closer &= pending
+            np.copyto(mindist, row, where=closer)
+            nearest[closer] = k
+    timing.record("examined", len(mst) * n)
+
+    return mst.result(nodes)
+
+
 def prim_generic_heap(graph, heap):
     """ Prim's algorithm for finding a minimum spanning tree. It implements the
     solution presented at Brassard's `Fundamentals of Algorithms' book. It uses
@@ -95,37 +160,40 @@ def prim_generic_heap(graph, heap):
     # initialization step    
     
     # Obtiene matriz de adyacencia con <inf> en nodos no conectados.
-    mx = nx.adjacency_matrix(graph).toarray()
-    mx[mx == 0] = 64000                           # Reemplaza ceros por <inf>
+    csr = CSRGraph.from_networkx(graph)
+    mx, inf = csr.to_dense()
+    nodes = csr.labels
     n = nx.number_of_nodes(graph)                 # Número de nodos del grafo
 
-    mst = []
+    mst = MSTBuilder()
 
     nearest = [0] * n     # nearest edge to i-node
-    mindist = [64000] * n
+    mindist = [inf] * n
     heapnode = [None] * n # item in the heap
     
     heapnode[0] = heap.insert(mindist[0],0)
     
-    # greedy loop
-    for _ in range(n):
-        # Use heap to obtain minimum edge
-        k = heap.extractmin().value
+    with timing.phase("greedy"):
+        # greedy loop
+        for _ in range(n):
+            # Use heap to obtain minimum edge
+            k = heap.extractmin().value
         
-        mindist[k] = -1
-        if graph.get_edge_data(nearest[k]+1, k+1) is not None:
-            mst.append((nearest[k]+1, k+1, graph.get_edge_data(nearest[k]+1, k+1)))
+            mindist[k] = -1
+            if k != 0:
+                mst.append(nearest[k], k, graph[nodes[nearest[k]]][nodes[k]]['weight'])
         
-        for j in range(1, n):
-            if mx[j,k] < mindist[j]:
-                mindist[j] = mx[j, k] # cost
-                nearest[j] = k        # edge
-                if heapnode[j] is None:
-                    heapnode[j] = heap.insert(mindist[j], j)
-                else:                    
-                    heap.decreasekey(heapnode[j], mindist[j])
-
-    return mst
+            for j in range(1, n):
+                if mx[j,k] < mindist[j]:
+                    mindist[j] = mx[j, k] # cost
+                    nearest[j] = k        # edge
+                    if heapnode[j] is None:
+                        heapnode[j] = heap.insert(mindist[j], j)
+                    else:                    
+                        heap.decreasekey(heapnode[j], mindist[j])
+    timing.record("examined", n * (n - 1))
+
+    return mst.result(nodes)
         
     
 def prim_generic_heap_nx(graph, heap):
@@ -135,35 +203,391 @@ def prim_generic_heap_nx(graph, heap):
     defined by the heap param. """
 
     # initialization step
-    mst = [] # list of edges that form the minimum spanning tree
+    # the cost, edge and heap item of each node are kept here and not as node
+    # attributes, so no heap stays reachable from the graph after the run
+    mst = MSTBuilder() # edges that form the minimum spanning tree
+    c_v = {}   # cost
+    e_v = {}   # edge
+    item = {}  # item in the heap
     for node in graph.nodes():        
-        graph.node[node]['c_v'] = float("inf")    # cost
-        graph.node[node]['e_v'] = None            # edge
-        graph.node[node]['heap'] = heap.insert(float("inf"), node)
+        c_v[node] = float("inf")
+        e_v[node] = None
+        item[node] = heap.insert(float("inf"), node)
     
-    # greedy loop
-    for _ in range(nx.number_of_nodes(graph)):
-        # Use heap to obtain minimum edge        
-        v = heap.extractmin().value
+    examined = 0
+    with timing.phase("greedy"):
+        # greedy loop
+        for _ in range(nx.number_of_nodes(graph)):
+            # Use heap to obtain minimum edge        
+            v = heap.extractmin().value
         
-        # the node v is now counted so c_v <- inf to exclude it from neighbors
-        graph.node[v]['c_v'] = float("-inf")
+            # the node v is now counted so c_v <- inf to exclude it from neighbors
+            c_v[v] = float("-inf")
         
-        # add the edge to the mst if the cost is know
-        if graph.node[v]['e_v'] is not None:
-            v1 = graph.node[v]['e_v']
-            mst.append((v, graph.node[v]['e_v'], {'weight':graph[v][v1]["weight"]}))
+            # add the edge to the mst if the cost is know
+            if e_v[v] is not None:
+                v1 = e_v[v]
+                mst.append(v, v1, graph[v][v1]["weight"])
         
-        # update the weights (costs) of the edges associated with min_node
-        for n in graph.neighbors(v):
-            if graph[v][n]["weight"] < graph.node[n]['c_v']:
-               graph.node[n]['c_v'] = graph[v][n]["weight"]
-               graph.node[n]['e_v'] = v
-               heap.decreasekey(graph.node[n]['heap'], graph.node[n]['c_v'])
-
-    return mst
-    
-       
+            # update the weights (costs) of the edges associated with min_node
+            examined += len(graph[v])
+            for n in graph.neighbors(v):
+                if graph[v][n]["weight"] < c_v[n]:
+                   c_v[n] = graph[v][n]["weight"]
+                   e_v[n] = v
+                   heap.decreasekey(item[n], c_v[n])
+    timing.record("examined", examined)
+
+    return mst.result()
+
+
+def prim_indexed_heap(graph, dary=None):
+    """ Prim's algorithm with an adjacency matrix and an indexed d-ary heap
+    (dary_heap.IndexedHeap). All the nodes enter the heap at once with their
+    distance to the first node (O(n) heapify). If dary is None, the arity is
+    chosen from m/n. """
+    # adjacency matrix with <inf> on non connected nodes
+    csr = CSRGraph.from_networkx(graph)
+    mx, inf = csr.to_dense()
+    nodes = csr.labels
+    n = csr.n
+
+    if dary is None:
+        dary = dh.auto_arity(n, nx.number_of_edges(graph))
+    heap = dh.IndexedHeap(n, dary)
+
+    mst = MSTBuilder()
+
+    nearest = [0] * n
+    mindist = mx[:, 0].tolist()
+    mindist[0] = -1
+    heap.heapify(mindist, range(1, n))
+
+    with timing.phase("greedy"):
+        # greedy loop
+        while len(heap):
+            k = heap.extractmin()
+            if mindist[k] == inf:
+                break # graph not connected
+
+            mst.append(nearest[k], k, mindist[k])
+            mindist[k] = -1
+
+            row = mx[k].tolist()
+            for j in range(1, n):
+                if row[j] < mindist[j]:
+                    mindist[j] = row[j]
+                    nearest[j] = k
+                    heap.decreasekey(j, row[j])
+    timing.record("examined", len(mst) * (n - 1))
+
+    return mst.result(nodes)
+
+
+def kruskal_scan(csr, edges, uf, mst):
+    """ Greedy loop of Kruskal over the edge ids in edges, which are sorted by
+    increasing length. The ids of the accepted edges are added to mst. Stops as
+    soon as the forest in uf spans the graph. Returns the number of edges
+    examined. """
+    examined = 0
+    for e, u, v in zip(edges.tolist(), csr.src[edges].tolist(), csr.dst[edges].tolist()):
+        if uf.count == 1:
+            break
+        examined += 1
+        ru = uf.find_id(u)
+        rv = uf.find_id(v)
+        if ru != rv:
+            mst.append(e)
+            uf.merge(ru, rv)
+    return examined
+
+
+def kruskal_csr(csr):
+    """ Kruskal's algorithm over a CSRGraph. Same greedy loop as kruskal, but
+    the edges are integer ids into the graph arrays, sorted with a stable
+    argsort, and the union-find works on dense node ids. The sorted edges are
+    scanned in blocks, and the scan stops once n - 1 edges are accepted. """
+    mst = [] # ids of the tree edges
+    uf = ds.ArrayDisjointSets(csr.n)
+
+    # edge ids sorted by increasing length
+    with timing.phase("sort"):
+        edges = np.argsort(csr.weight, kind="stable")
+
+    with timing.phase("greedy"):
+        block = max(1024, csr.n)
+        examined = 0
+        for start in range(0, csr.m, block):
+            examined += kruskal_scan(csr, edges[start:start + block], uf, mst)
+            if uf.count == 1:
+                break
+    timing.record("examined", examined)
+
+    return MSTResult.from_ids(csr, mst)
+
+
+def kruskal_lazy(csr, heap=None, dary=2):
+    """ Kruskal's algorithm without sorting the edges. The edge weights are
+    heapified in O(m) and the edges are popped in increasing order only until
+    the forest spans the graph. By default an indexed d-ary heap is built in
+    bulk (dary_heap.IndexedHeap); any heap with the insert/extractmin interface
+    of dary_heap.Heap can be given instead. """
+    mst = [] # ids of the tree edges
+    src, dst, weight = csr.src.tolist(), csr.dst.tolist(), csr.weight.tolist()
+    uf = ds.ArrayDisjointSets(csr.n)
+
+    # the heap build stands in for the sort of the other Kruskal methods
+    with timing.phase("sort"):
+        if heap is None:
+            heap = dh.IndexedHeap(csr.m, dary)
+            heap.heapify(weight)
+            pop = heap.extractmin
+        else:
+            for e in range(csr.m):
+                heap.insert(weight[e], e)
+            pop = lambda: heap.extractmin().value
+
+    with timing.phase("greedy"):
+        examined = 0
+        while uf.count > 1 and examined < csr.m:
+            e = pop()
+            examined += 1
+            u = uf.find_id(src[e])
+            v = uf.find_id(dst[e])
+            if u != v:
+                mst.append(e)
+                uf.merge(u, v)
+    timing.record("examined", examined)
+
+    return MSTResult.from_ids(csr, mst)
+
+
+def kruskal_filter(csr):
+    """ Filter-Kruskal (Osipov, Sanders and Singler). The edges are split
+    around a random pivot weight; the light edges are solved first, and then
+    the heavy edges that join nodes already in the same component are
+    discarded (a vectorized find_many) before they are sorted. On dense graphs
+    most of the edges are never sorted. """
+    mst = [] # ids of the tree edges
+    uf = ds.ArrayDisjointSets(csr.n)
+    threshold = max(1024, csr.n)
+    rng = np.random.default_rng(0)
+
+    def solve(edges):
+        if uf.count == 1 or len(edges) == 0:
+            return
+        if len(edges) <= threshold:
+            with timing.phase("sort"):
+                order = np.argsort(csr.weight[edges], kind="stable")
+            with timing.phase("greedy"):
+                timing.record("examined", kruskal_scan(csr, edges[order], uf, mst))
+            return
+
+        weight = csr.weight[edges]
+        pivot = weight[rng.integers(len(edges))]
+        solve(edges[weight < pivot])
+        # the edges equal to the pivot need no sort
+        solve_filtered(edges[weight == pivot], sort=False)
+        solve_filtered(edges[weight > pivot])
+
+    def solve_filtered(edges, sort=True):
+        if uf.count == 1 or len(edges) == 0:
+            return
+        edges = edges[uf.find_many(csr.src[edges]) != uf.find_many(csr.dst[edges])]
+        if sort:
+            solve(edges)
+        else:
+            with timing.phase("greedy"):
+                timing.record("examined", kruskal_scan(csr, edges, uf, mst))
+
+    solve(np.arange(csr.m))
+    return MSTResult.from_ids(csr, mst)
+
+
+# Largest range of integer weights sorted by kruskal_counting (16-bit keys)
+COUNTING_RANGE = 2**16
+
+
+def kruskal_counting(csr):
+    """ Kruskal's algorithm for small integer weights. The edges are bucketed
+    by weight in linear time (NumPy's stable sort is a radix sort for 8 and 16
+    bit keys) and the buckets are scanned lowest first; the edges of a bucket
+    that join nodes already in the same component are dropped with a
+    vectorized find_many before the scan. The scan stops once the forest spans
+    the graph, so the higher buckets are never scanned. Float weights, or a
+    range of more than COUNTING_RANGE values, fall back to kruskal_csr. """
+    weight = csr.weight
+    if csr.m == 0 or not np.array_equal(weight, np.round(weight)):
+        return kruskal_csr(csr)
+    lo = weight.min()
+    span = int(weight.max() - lo) + 1
+    if span > COUNTING_RANGE:
+        return kruskal_csr(csr)
+
+    mst = [] # ids of the tree edges
+    uf = ds.ArrayDisjointSets(csr.n)
+
+    # edge ids grouped by weight, and the bounds of each bucket
+    with timing.phase("sort"):
+        keys = (weight - lo).astype(np.uint8 if span <= 2**8 else np.uint16)
+        edges = np.argsort(keys, kind="stable")
+        bounds = np.zeros(span + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=span), out=bounds[1:])
+
+    with timing.phase("greedy"):
+        examined = 0
+        for b in range(span):
+            if uf.count == 1:
+                break
+            bucket = edges[bounds[b]:bounds[b + 1]]
+            if len(bucket) > csr.n:
+                bucket = bucket[uf.find_many(csr.src[bucket]) != uf.find_many(csr.dst[bucket])]
+            examined += kruskal_scan(csr, bucket, uf, mst)
+    timing.record("examined", examined)
+
+    return MSTResult.from_ids(csr, mst)
+
+
+def prim_csr(csr):
+    """ Prim's algorithm over a CSRGraph. Brassard's array version (see prim),
+    but the relaxation step only visits the neighbors of the new node instead
+    of a full row of the adjacency matrix. """
+    offsets, adj, adj_weight = csr.lists()
+    labels = csr.labels
+    n = csr.n
+    inf = float("inf")
+
+    mst = MSTBuilder()
+
+    nearest = [0] * n
+    mindist = [inf] * n
+    for i in range(offsets[0], offsets[1]):
+        mindist[adj[i]] = adj_weight[i]
+    mindist[0] = -1
+
+    examined = 0
+    with timing.phase("greedy"):
+        # greedy loop
+        for _ in range(n - 1):
+            mini = inf
+            k = -1
+
+            # minimum edge search
+            for j in range(1, n):
+                if 0 <= mindist[j] < mini:
+                    mini = mindist[j]
+                    k = j
+            if k < 0:
+                break # graph not connected
+
+            mst.append(nearest[k], k, mini)
+            mindist[k] = -1
+
+            examined += offsets[k + 1] - offsets[k]
+            for i in range(offsets[k], offsets[k + 1]):
+                j = adj[i]
+                if adj_weight[i] < mindist[j]:
+                    mindist[j] = adj_weight[i]
+                    nearest[j] = k
+    timing.record("examined", examined)
+
+    return mst.result(labels)
+
+
+def prim_generic_heap_csr(csr, heap):
+    """ Prim's algorithm over a CSRGraph with a user defined heap. It is the
+    CSR counterpart of prim_generic_heap and prim_generic_heap_nx. """
+    offsets, adj, adj_weight = csr.lists()
+    labels = csr.labels
+    n = csr.n
+    inf = float("inf")
+
+    mst = MSTBuilder()
+
+    nearest = [-1] * n    # nearest edge to i-node
+    mindist = [inf] * n
+    heapnode = [None] * n # item in the heap
+
+    heapnode[0] = heap.insert(0, 0)
+    size = 1              # items in the heap
+
+    examined = 0
+    with timing.phase("greedy"):
+        # greedy loop
+        while size:
+            item = heap.extractmin()
+            size -= 1
+            k = item.value
+
+            mindist[k] = -1
+            if nearest[k] >= 0:
+                mst.append(nearest[k], k, item.key)
+
+            examined += offsets[k + 1] - offsets[k]
+            for i in range(offsets[k], offsets[k + 1]):
+                j = adj[i]
+                if adj_weight[i] < mindist[j]:
+                    mindist[j] = adj_weight[i] # cost
+                    nearest[j] = k             # edge
+                    if heapnode[j] is None:
+                        heapnode[j] = heap.insert(mindist[j], j)
+                        size += 1
+                    else:
+                        heap.decreasekey(heapnode[j], mindist[j])
+    timing.record("examined", examined)
+
+    return mst.result(labels)
+
+
+def prim_lazy(csr, array_heap=False):
+    """ Prim's algorithm over a CSRGraph without decreasekey (lazy deletion).
+    Every edge that gets closer to a node pushes a (weight, node, parent)
+    entry onto a binary heap, and the entries of the nodes already in the tree
+    are skipped when popped. The heap is a heapq list, or with array_heap a
+    dary_heap.EntryHeap. The number of skipped entries is recorded as
+    "stale". """
+    offsets, adj, adj_weight = csr.lists()
+    labels = csr.labels
+    n = csr.n
+    inf = float("inf")
+
+    mst = MSTBuilder()
+
+    mindist = [inf] * n   # -1 for the nodes in the tree
+    if array_heap:
+        heap = dh.EntryHeap()
+        push, pop = heap.push, heap.pop
+    else:
+        heap = []
+        push, pop = partial(heapq.heappush, heap), partial(heapq.heappop, heap)
+
+    push((0, 0, -1))
+
+    with timing.phase("greedy"):
+        # greedy loop
+        stale = examined = 0
+        while len(heap) and len(mst) < n - 1:
+            w, k, parent = pop()
+            if mindist[k] < 0:
+                stale += 1
+                continue
+
+            mindist[k] = -1
+            if parent >= 0:
+                mst.append(parent, k, w)
+
+            examined += offsets[k + 1] - offsets[k]
+            for i in range(offsets[k], offsets[k + 1]):
+                j = adj[i]
+                if adj_weight[i] < mindist[j]:
+                    mindist[j] = adj_weight[i]
+                    push((adj_weight[i], j, k))
+    timing.record("stale", stale)
+    timing.record("examined", examined)
+
+    return mst.result(labels)
+
+
 def get_args():
     """ Parse arguments from the command line """
     parser = ArgumentParser()
@@ -172,84 +596,119 @@ def get_args():
     parser.add_argument("--graph", help="Generate graphs", action="store_true")
     parser.add_argument("--reportgraph", help="Generate report and complete graphs for the report", action="store_true")
     parser.add_argument("--test", help="Run the test", action="store_true")
+    parser.add_argument("--jobs", help="Number of worker processes for the test", default=1, type=int)
+    parser.add_argument("--pin", help="Pin each worker process to a core", action="store_true")
+    parser.add_argument("--isolate", help="Run only one timed method at a time across workers", action="store_true")
+    parser.add_argument("--algorithms", help="Comma separated list of methods to test (default: all)", default="", type=str)
+    parser.add_argument("--exclude", help="Comma separated list of methods not to test", default="", type=str)
+    parser.add_argument("--timeout", help="Time limit in secs per method run (0: no limit)", default=0, type=float)
+    parser.add_argument("--warmup", help="Untimed runs before each timed run", default=0, type=int)
+    parser.add_argument("--nogc", help="Disable the garbage collector while timing", action="store_true")
+    parser.add_argument("--memory", help="Record the peak traced memory and the RSS growth of each run (in an extra untimed run)", action="store_true")
+    parser.add_argument("--resume", "--only-missing", dest="resume", help="Run only the tests not in the result store", action="store_true")
     return parser.parse_args()
     
     
-def test_mst(graph):
+# Registered MST methods, in the order they are tested and reported.
+mst_registry.register("kruskal_sorted1", "Kruskal (KS1)", kruskal, representation="sorted_edges")
+mst_registry.register("kruskal_sorted2", "Kruskal (KS2)", kruskal, sort=True)
+mst_registry.register("prim", "PrimArr", prim)
+mst_registry.register("prim_dense", "PrimArr (NumPy)", prim_dense)
+mst_registry.register("prim_2h", "Prim2H (A)", prim_generic_heap, heap=lambda: dh.Heap(2))
+mst_registry.register("prim_2h_nx", "Prim2H", prim_generic_heap_nx, heap=lambda: dh.Heap(2))
+mst_registry.register("prim_3h", "Prim3H (A)", prim_generic_heap, heap=lambda: dh.Heap(3))
+mst_registry.register("prim_3h_nx", "Prim3H", prim_generic_heap_nx, heap=lambda: dh.Heap(3))
+mst_registry.register("prim_binomial", "PrimBi (A)", prim_generic_heap, heap=bh.BinomialHeap)
+mst_registry.register("prim_binomial_nx", "PrimBi", prim_generic_heap_nx, heap=bh.BinomialHeap)
+mst_registry.register("prim_fibonacci", "PrimFib (A)", prim_generic_heap, heap=fh.FibonacciHeap)
+mst_registry.register("prim_fibonacci_nx", "PrimFib", prim_generic_heap_nx, heap=fh.FibonacciHeap)
+mst_registry.register("prim_pairing", "PrimPair (A)", prim_generic_heap, heap=ph.PairingHeap)
+mst_registry.register("prim_pairing_nx", "PrimPair", prim_generic_heap_nx, heap=ph.PairingHeap)
+mst_registry.register("prim_bucket", "PrimBucket (A)", prim_generic_heap, heap=bq.auto_queue, heap_input=True)
+mst_registry.register("prim_bucket_nx", "PrimBucket", prim_generic_heap_nx, heap=bq.auto_queue, heap_input=True)
+mst_registry.register("prim_4h", "Prim4H (A)", prim_indexed_heap, dary=4)
+mst_registry.register("prim_8h", "Prim8H (A)", prim_indexed_heap, dary=8)
+mst_registry.register("prim_16h", "Prim16H (A)", prim_indexed_heap, dary=16)
+mst_registry.register("prim_autoh", "PrimAutoH (A)", prim_indexed_heap)
+mst_registry.register("kruskal_csr", "Kruskal (CSR)", kruskal_csr, representation="csr")
+mst_registry.register("kruskal_filter", "Kruskal (Filter)", kruskal_filter, representation="csr")
+mst_registry.register("kruskal_counting", "Kruskal (Counting)", kruskal_counting, representation="csr")
+mst_registry.register("kruskal_lazy", "Kruskal (Lazy)", kruskal_lazy, representation="csr", version=2)
+mst_registry.register("kruskal_lazy_2h", "Kruskal (Lazy 2H)", kruskal_lazy, heap=lambda: dh.Heap(2), representation="csr", version=2)
+mst_registry.register("boruvka", "Boruvka", boruvka.boruvka, representation="csr")
+mst_registry.register("boruvka_mp", "Boruvka (MP)", boruvka.boruvka_parallel, representation="csr_shared", version=2)
+mst_registry.register("prim_csr", "PrimArr (CSR)", prim_csr, representation="csr")
+mst_registry.register("prim_2h_csr", "Prim2H (CSR)", prim_generic_heap_csr, heap=lambda: dh.Heap(2), representation="csr")
+mst_registry.register("prim_lazy", "PrimLazy (CSR)", prim_lazy, representation="csr")
+mst_registry.register("prim_lazy_array", "PrimLazy (CSR, Array)", prim_lazy, array_heap=True, representation="csr")
+
+
+class MSTTimeout(Exception): pass
+
+
+def run_method(algorithm, inputs, timeout=None, warmup=0, disable_gc=False, memory=False):
+    """ Runs a registered algorithm and returns the mst and the
+    timing.Sample of the run. Building its input is not timed. If the run
+    takes more than timeout secs it is stopped and (None, None) is returned.
+    With memory, an extra run (not timed, and not stopped by timeout) records
+    the peak traced memory and the RSS growth (bytes) as the "peak_memory"
+    and "rss_delta" counters of the sample. """
+    algorithm.args(inputs) # builds the input representation
+    alarm = timeout and hasattr(signal, "setitimer")
+    if alarm:
+        def on_alarm(signum, frame):
+            raise MSTTimeout(algorithm.name)
+        handler = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        mst, sample = timing.measure(algorithm, lambda: algorithm.args(inputs), warmup, disable_gc)
+    except MSTTimeout:
+        return None, None
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, handler)
+
+    if memory:
+        mst = None # only the tree of the measured run is alive
+        mst, peak, delta = timing.memory(algorithm, lambda: algorithm.args(inputs))
+        sample.counters["peak_memory"] = peak
+        sample.counters["rss_delta"] = delta
+    return mst, sample
+
+
+def test_mst(graph, methods=None, inputs=None, timeout=None, warmup=0, disable_gc=False, memory=False):
     """ Calculates the mst of graph with kruskal and prim. Returns a dictionary
-    with the results for each methods: mst, calc time in usecs and number of 
-    edges in the mst. """
-    results = {}
-    clockt = 0
-    mst = []
-
-    #clockt = time.clock()
-    #mst = nx.minimum_spanning_tree(graph)
-    #clockt = time.clock() - clockt
-    #tests["kruskal_nx"] = [mst.edges(data=True), clockt]
-    
-    edges = graph.edges(data=True)
-    edges.sort(key=lambda edge: edge[2]['weight'])
-    clockt = time.clock()
-    mst = kruskal(graph, edges)
-    clockt = time.clock() - clockt
-    results["kruskal_sorted1"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = kruskal(graph, sort=True)
-    clockt = time.clock() - clockt
-    results["kruskal_sorted2"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim(graph)
-    clockt = time.clock() - clockt
-    results["prim"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim_generic_heap(graph, dh.Heap(2))
-    clockt = time.clock() - clockt
-    results["prim_2h"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim_generic_heap_nx(graph, dh.Heap(2))
-    clockt = time.clock() - clockt
-    results["prim_2h_nx"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim_generic_heap(graph, dh.Heap(3))
-    clockt = time.clock() - clockt
-    results["prim_3h"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim_generic_heap_nx(graph, dh.Heap(3))
-    clockt = time.clock() - clockt
-    results["prim_3h_nx"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim_generic_heap(graph, bh.BinomialHeap())
-    clockt = time.clock() - clockt
-    results["prim_binomial"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim_generic_heap_nx(graph, bh.BinomialHeap())
-    clockt = time.clock() - clockt
-    results["prim_binomial_nx"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim_generic_heap(graph, fh.FibonacciHeap())
-    clockt = time.clock() - clockt
-    results["prim_fibonacci"] = [mst, clockt]
-    
-    clockt = time.clock()
-    mst = prim_generic_heap_nx(graph, fh.FibonacciHeap())
-    clockt = time.clock() - clockt
-    results["prim_fibonacci_nx"] = [mst, clockt]
+    with the results for each methods: mst (an MSTResult), calc time in secs,
+    number of edges in the mst, mst weight and timing.Sample (None for the
+    methods that timed out or cannot run on graph, see MSTAlgorithm.check).
+    With memory, the samples also have the memory counters of the run (see
+    run_method). """
+    results = OrderedDict()
+
+    # representations of the graph used by the methods; they are built once
+    # and are not timed
+    if inputs is None:
+        inputs = {"nx": (graph,)}
+
+    samples = {}
+    for method in (methods or mst_registry.names()):
+        algorithm = mst_registry.get(method)
+        if algorithm.check(inputs) is not None:
+            mst, samples[method] = None, None
+        else:
+            mst, samples[method] = run_method(algorithm, inputs, timeout, warmup, disable_gc, memory)
+        results[method] = [mst, samples[method].wall if samples[method] else float("nan")]
     
     # calculates length and sum weight for each mst
     for method, result in results.items():
         rmst = result[0]
+        if rmst is None:
+            result.extend([None, None, None])
+            continue
         result.append(len(rmst))
-        result.append(sum(edge[2]['weight'] for edge in rmst))
+        result.append(rmst.total_weight)
+        result.append(samples[method])
     
     return [nx.number_of_nodes(graph), 
             nx.number_of_edges(graph), 
@@ -257,15 +716,228 @@ def test_mst(graph):
             results]
                     
 
+# State of a test worker process: the last graph loaded, the lock used to
+# run one timed method at a time (--isolate) and the test options.
+_worker = {"file": None, "lock": None, "options": {}}
+
+
+def init_worker(lock, counter, options):
+    """ Initializes a test worker process, or the main process for the
+    serial tests (counter None; there is no pinning then). """
+    _worker["lock"] = lock
+    _worker["options"] = options
+    if options.get("pin") and counter is not None and hasattr(os, "sched_setaffinity"):
+        with counter.get_lock():
+            i = counter.value
+            counter.value += 1
+        cores = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cores[i % len(cores)]})
+
+
+def run_task(task):
+    """ Runs one (file, rep, method) test. The graph is loaded only when the
+    worker moves on to a new file. Returns the graph properties and the
+    measures of the run: times (secs), memory (bytes, nan unless the memory
+    option is set) and mst checksum (number of edges, weight and hash of the
+    edge set). The methods that cannot run on the graph get nan measures and
+    the reason in "skipped". """
+    edge_file, rep, method = task
+    if _worker["file"] != edge_file:
+        _worker["file"] = None # release the previous graph first
+        start = time.perf_counter()
+        edgelist = graph_io.load_edgelist(edge_file)
+        _worker["load"] = time.perf_counter() - start
+        start = time.perf_counter()
+        graph = edgelist.to_networkx()
+        _worker["convert"] = time.perf_counter() - start
+        _worker["graph"] = graph
+        _worker["inputs"] = {"nx": (graph,)}
+        _worker["props"] = (nx.number_of_nodes(graph), nx.number_of_edges(graph), nx.density(graph))
+        _worker["file"] = edge_file
+
+    options = _worker["options"]
+    algorithm = mst_registry.get(method)
+    nan = float("nan")
+    # the input is built before taking the lock
+    reason = algorithm.check(_worker["inputs"])
+    if reason is not None:
+        measures = dict((c, nan) for c in RESULT_COLUMNS)
+        measures.update({"length": None, "weight": None, "digest": None, "skipped": reason})
+        return (edge_file, rep, method, _worker["props"], measures)
+
+    lock = _worker["lock"]
+    if lock is not None:
+        lock.acquire()
+    try:
+        result = test_mst(_worker["graph"], [method], _worker["inputs"],
+                          options.get("timeout"), options.get("warmup", 0),
+                          options.get("disable_gc", False),
+                          options.get("memory", False))[3][method]
+    finally:
+        if lock is not None:
+            lock.release()
+
+    sample = result[4]
+    measures = {"Time": result[1],
+                "CPUTime": sample.cpu if sample else nan,
+                "Load": _worker["load"],
+                "Convert": _worker["convert"] + algorithm.setup_time(_worker["inputs"]),
+                "Sort": sample.phase("sort") if sample else nan,
+                "Greedy": sample.phase("greedy") if sample else nan,
+                "Examined": sample.counter("examined") if sample else nan,
+                "Stale": sample.counter("stale") if sample else nan,
+                "PeakMemory": sample.counter("peak_memory") if sample else nan,
+                "RSSDelta": sample.counter("rss_delta") if sample else nan,
+                "length": result[2],
+                "weight": result[3],
+                "digest": result[0].digest if result[0] is not None else None}
+    return (edge_file, rep, method, _worker["props"], measures)
+
+
+def check_results(results):
+    """ Verifies that all the methods give the same mst length and weight.
+    results are (method, measures) tuples; the methods that timed out or were
+    skipped are not checked. """
+    results = [r for r in results if r[1]["length"] is not None]
+    if not results:
+        return True
+    # same edge set; otherwise (ties) the trees may differ but not their
+    # length and weight
+    if len(set(r[1]["digest"] for r in results)) == 1:
+        return True
+    lmst = results[0]
+    for r in results[1:]:
+        if r[1]["length"] != lmst[1]["length"]:
+            print("ERROR!!! {0} |mst|={1}, {2} |mst|={3}".format(lmst[0],lmst[1]["length"],r[0],r[1]["length"]), file=sys.stderr)
+            return False
+    for r in results[1:]:
+        if r[1]["weight"] != lmst[1]["weight"]:
+            print("ERROR!!! {0} wmst={1}, {2} wmst={3}".format(lmst[0],lmst[1]["weight"],r[0],r[1]["weight"]), file=sys.stderr)
+            return False
+    return True
+
+
+# Columns of the results file, after the graph and method columns. Sort and
+# Greedy are the times of those phases (for kruskal_lazy, Sort is the heap
+# build); Examined is the number of edges looked at by the greedy loop (for
+# Prim, the neighbor entries relaxed) and Stale the heap entries skipped by the
+# lazy-deletion methods (prim_lazy). They are nan for the methods without that
+# phase or counter.
+RESULT_COLUMNS = ["Time", "CPUTime", "Load", "Convert", "Sort", "Greedy", "Examined", "Stale",
+                  "PeakMemory", "RSSDelta"]
+
+
+def run_tests(edge_files, save_file, args, methods=None, summary_file=None, store=None):
+    """ Tests the mst methods on every file, args.numreps times, and writes
+    the results into save_file (and the min/median/IQR of the times of each
+    method and file into summary_file). With args.jobs > 1 the
+    (file, rep, method) tasks run in a process pool. The runs are saved in
+    store (a result_store.ResultStore), and with args.resume the runs already
+    in the store, measured with the same settings, are not run again. Returns False if the methods disagree. """
+    methods = list(methods or mst_registry.names())
+    tasks = [(edge_file, rep, method)
+             for edge_file in edge_files
+             for rep in range(args.numreps)
+             for method in methods]
+    options = {"pin": args.pin, "timeout": args.timeout,
+               "warmup": args.warmup, "disable_gc": args.nogc,
+               "memory": args.memory}
+    # options that change the measures; only the stored runs measured with
+    # the same ones are reused
+    settings = {"warmup": args.warmup, "nogc": args.nogc, "memory": args.memory,
+                "jobs": args.jobs, "pin": args.pin, "isolate": args.isolate}
+
+    # results of the tasks found in the store
+    stored = {}
+    if store is not None:
+        checksums = dict((edge_file, graph_io.file_checksum(edge_file)) for edge_file in edge_files)
+        if args.resume:
+            for edge_file, rep, method in tasks:
+                result = store.get(checksums[edge_file], method, mst_registry.get(method).version, settings, rep)
+                if result is not None:
+                    stored[edge_file, rep, method] = result
+            print("Resuming: {0} of {1} runs found in {2}".format(len(stored), len(tasks), store.path), file=sys.stdout)
+    missing = [task for task in tasks if task not in stored]
+
+    pool = None
+    if args.jobs > 1 and missing:
+        lock = multiprocessing.Lock() if args.isolate else None
+        counter = multiprocessing.Value('i', 0)
+        pool = multiprocessing.Pool(args.jobs, init_worker, (lock, counter, options))
+        outputs = pool.imap(run_task, missing)
+    else:
+        init_worker(None, None, options)
+        outputs = map(run_task, missing)
+
+    times = OrderedDict() # (file, method) -> times of each rep
+    try:
+        # the outputs come in task order: one group of methods per (file, rep)
+        group = []
+        for task in tasks:
+            if task in stored:
+                edge_file, rep, method = task
+                props, measures = stored[task]
+            else:
+                edge_file, rep, method, props, measures = next(outputs)
+                if store is not None and measures["length"] is not None:
+                    store.put(checksums[edge_file], method, mst_registry.get(method).version, settings, rep,
+                              os.path.basename(edge_file), props, measures)
+            if rep == 0 and not group and method == methods[0]:
+                print("Testing {0} ...".format(edge_file), file=sys.stdout)
+            group.append((method, measures))
+            times.setdefault((os.path.basename(edge_file), method), []).append(measures["Time"])
+            if measures.get("skipped"):
+                if rep == 0:
+                    print("Warning: {0} skipped on {1}: {2}".format(method, edge_file, measures["skipped"]), file=sys.stderr)
+            elif measures["length"] is None:
+                print("Timeout: {0} on {1} (rep {2})".format(method, edge_file, rep), file=sys.stderr)
+            if len(group) < len(methods):
+                continue
+
+            if not check_results(group):
+                return False
+
+            # Write the results into the output file (nan for the columns
+            # added after a stored run)
+            for method, measures in group:
+                save_file.write("{0}\t{1}\t{2}\t{3}\t{4:0.1}\t".format(rep, os.path.basename(edge_file), props[0], props[1], props[2]))
+                save_file.write("{0}\t{1}\n".format(method, "\t".join(str(measures.get(c, float("nan"))) for c in RESULT_COLUMNS)))
+            save_file.write("\n")
+            save_file.flush()
+            group = []
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    if summary_file is not None:
+        summary_file.write("File\tAlgorithm\tSamples\tMin\tMedian\tIQR\n")
+        for (edge_file, method), values in times.items():
+            summary_file.write("{0}\t{1}\t{2}\t{3}\t{4}\t{5}\n".format(edge_file, method, *timing.summarize(values)))
+
+    return True
+
+
 def main():    
     args = get_args()
 
     # Output file path
     save_file_path = "{0}/test-result.txt".format(args.graphpath)
+    summary_file_path = "{0}/test-summary.txt".format(args.graphpath)
+    store_path = "{0}/test-results.db".format(args.graphpath)
     
     if args.test:
-        # Search for all the edge files in grappath directory
-        edge_files = glob.glob("{0}/*.edgelist".format(args.graphpath))
+        # The corpus is listed in the manifest written by testgen; without
+        # one, search for all the edge files in grappath directory
+        manifest = graph_io.read_manifest(args.graphpath)
+        if manifest is not None:
+            edge_files = [os.path.join(args.graphpath, row["File"]) for row in manifest]
+            missing = [f for f in edge_files if not os.path.exists(f)]
+            for f in missing:
+                print("Warning: {0} is in the manifest but not found".format(f), file=sys.stderr)
+            edge_files = [f for f in edge_files if f not in missing]
+        else:
+            edge_files = glob.glob("{0}/*.edgelist".format(args.graphpath))
         
         # Verifies that there are .edgelist files in graphpath
         if not edge_files:
@@ -273,47 +945,29 @@ def main():
             print("Error: No *.edgelist files found in {0} directory!".format(path_string), file=sys.stderr)
             return        
            
-        with open(save_file_path, "w") as save_file:        
-            save_file.write("Test\tFile\tNodes\tEdges\tDensity\tAlgorithm\tTime\n")
-            
-            for edge_file in edge_files:            
-                print("Testing {0} ...".format(edge_file), file=sys.stdout)
-                
-                for rep in range(args.numreps):
-                    # Read graph from the file
-                    graph = nx.read_weighted_edgelist(edge_file, nodetype=int)
-    
-                    # Test the mst methods
-                    result = test_mst(graph)
-                    
-                    # Verifies that all the methods give the same mst length
-                    mst_lengths = []
-                    for method, method_results in result[3].items():
-                        mst_lengths.append((method, method_results[2]))
-                    lmst = mst_lengths[0]
-                    for r in mst_lengths[1:]:
-                        if r[1] != lmst[1]:
-                            print("ERROR!!! {0} |mst|={1}, {2} |mst|={3}".format(lmst[0],lmst[1],r[0],r[1]), file=sys.stderr)                        
-                            return
-                            
-                    # Verifies that all the methods give the same mst weight
-                    mst_weights = []
-                    for method, method_results in result[3].items():
-                        mst_weights.append((method, method_results[3]))
-                    wmst = mst_weights[0]
-                    for r in mst_weights[1:]:
-                        if r[1] != wmst[1]:
-                            print("ERROR!!! {0} wmst={1}, {2} wmst={3}".format(wmst[0],wmst[1],r[0],r[1]), file=sys.stderr)                        
-                            return                
-                    
-                    # Write the results into the output file
-                    for method, method_results in result[3].items():
-                        save_file.write("{0}\t{1}\t{2}\t{3}\t{4:0.1}\t".format(rep, os.path.basename(edge_file), result[0], result[1], result[2]))
-                        save_file.write("{0}\t{1}\n".format(method, method_results[1]))
-                    save_file.write("\n")
-                 
-                # Flush last rep results into the output file
-                save_file.flush()
+        # Methods to test
+        try:
+            methods = mst_registry.select([m for m in args.algorithms.split(",") if m],
+                                          [m for m in args.exclude.split(",") if m])
+        except KeyError as e:
+            print("Error: Unknown method {0}! Valid methods: {1}".format(e, ", ".join(mst_registry.names())), file=sys.stderr)
+            return
+
+        # the methods that start processes cannot run in the test workers
+        if args.jobs > 1:
+            skipped = [m for m in methods if mst_registry.get(m).representation in mst_registry.PROCESS_REPRESENTATIONS]
+            if skipped:
+                print("Warning: {0} not tested with --jobs > 1".format(", ".join(skipped)), file=sys.stderr)
+                methods = [m for m in methods if m not in skipped]
+           
+        with open(save_file_path, "w") as save_file, open(summary_file_path, "w") as summary_file, \
+                result_store.ResultStore(store_path) as store:
+            save_file.write("Test\tFile\tNodes\tEdges\tDensity\tAlgorithm\t{0}\n".format("\t".join(RESULT_COLUMNS)))
+            if not run_tests(edge_files, save_file, args, methods, summary_file, store):
+                return
+
+        # Columnar copy of the results, read by process_results
+        pr.save_results(save_file_path)
             
         # Generate the graphs for this test
         if args.graph:
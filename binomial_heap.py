@@ -1,10 +1,14 @@
 # Code borrowed from: http://code.activestate.com/recipes/511508-binomial-queues/
 
+import math
+
 class LinkError(Exception): pass
 class EmptyBinomialHeapError(Exception): pass
     
 class TreeItem:
     """ An item in a binomial tree. """
+    __slots__ = ("key", "value", "tree")
+
     def __init__(self, key, value, tree):
         self.key = key
         self.value = value
@@ -12,7 +16,8 @@ class TreeItem:
 
 class BinomialTree:
     """ A binomial tree implementation """
-    
+    __slots__ = ("rank", "item", "children", "parent")
+
     def __init__(self, key, value):
         """ Create a one-node tree. key is the priority of this node """
         self.rank = 0       # tree rank
@@ -47,7 +52,7 @@ class BinomialTree:
     def str(self, indent = 0):
         """ Returns a string representation of the tree. """
         return (" " * indent +
-                "rank: %d key: %d value: %s" % (self.rank, self.item.key,self.item.value) +
+                "rank: %d key: %s value: %s" % (self.rank, self.item.key,self.item.value) +
                 "\n" + "".join(child.str(indent+2) for child in self.children) )
     
     def __str__(self):
@@ -57,50 +62,78 @@ class BinomialTree:
 class BinomialHeap:
     """  Implements a Binomial Heap """
     
-    def __init__(self, infinity=1e300):
-        """ Create an empty Binomial Queue. """
-        self.infinity = infinity
+    def __init__(self):
+        """ Create an empty Binomial Queue. min_tree_rank is -1 while the heap
+        is empty; the keys may be inf. """
         self.parent = self
         self.trees = []
         self.elements = 0        
-        self.min_key = self.infinity
-        self.min_value = self.infinity
+        self.min_key = math.inf
+        self.min_value = None
         self.min_tree_rank = -1
 
-    def __capacity(self):
-        """ Returns the actual tree's capacity. """
-        return 2 ** len(self.trees) - 1
-
-    def __resize(self):
-        """ Change the current size of the tree. """
-        while self.__capacity() < self.elements:
-            self.trees.append(None)
+    def __len__(self):
+        return self.elements
 
-    def __add_tree(self, new_tree):
-        """ Insert new_tree into self """
-        self.elements = self.elements + 2 ** new_tree.rank
-        self.__resize()
-
-        while self.trees[new_tree.rank] is not None:
-            if self.trees[new_tree.rank].item.key < new_tree.item.key:
+    def __link_tree(self, new_tree):
+        """ Insert new_tree into self, linking it with the trees of the same
+        rank, without updating the minimum. Returns the resulting tree. """
+        trees = self.trees
+        r = new_tree.rank
+        while r < len(trees) and trees[r] is not None:
+            if trees[r].item.key < new_tree.item.key:
                 # swap
-                new_tree, self.trees[new_tree.rank] = self.trees[new_tree.rank], new_tree
-            r = new_tree.rank
-            new_tree.link(self.trees[r])
-            self.trees[r] = None
+                new_tree, trees[r] = trees[r], new_tree
+            new_tree.link(trees[r])
+            trees[r] = None
+            r += 1
 
-        self.trees[new_tree.rank] = new_tree
-        
-        if new_tree.item.key <= self.min_key:
+        if r == len(trees):
+            trees.append(None)
+        trees[r] = new_tree
+        return new_tree
+
+    def __add_tree(self, new_tree):
+        """ Insert new_tree into self. If the minimum was in a tree linked with
+        new_tree, it is now in the root of the result. """
+        new_tree = self.__link_tree(new_tree)
+        if self.min_tree_rank < 0 or new_tree.item.key <= self.min_key:
             self.min_key = new_tree.item.key
             self.min_value = new_tree.item.value
             self.min_tree_rank = new_tree.rank
 
     def insert(self, key, value):
         """ Insert key and value into the heap. """
-        tree = BinomialTree(key, value)        
+        tree = BinomialTree(key, value)
+        self.elements += 1
         self.__add_tree(tree)
         return tree.item
+
+    def build(self, keys, values):
+        """ Bulk insert of the pairs (keys[i], values[i]). Returns the list of
+        inserted items. The one-node trees are linked directly (O(1)
+        amortized each, as the carries of a binary counter), and the minimum
+        is searched once at the end, so the build is O(n). """
+        items = []
+        for key, value in zip(keys, values):
+            tree = BinomialTree(key, value)
+            self.__link_tree(tree)
+            items.append(tree.item)
+        self.elements += len(items)
+        self.__update_min()
+        return items
+
+    def __update_min(self):
+        """ Search the minimum among the tree roots. """
+        self.min_key = math.inf
+        self.min_value = None
+        self.min_tree_rank = -1
+        for tree in self.trees:
+            if tree is not None:
+                if self.min_tree_rank < 0 or tree.item.key < self.min_key:
+                    self.min_key = tree.item.key
+                    self.min_value = tree.item.value
+                    self.min_tree_rank = tree.rank
                    
     def extractmin(self):
         """ Take the minimum element in the heap and remove it. """
@@ -109,34 +142,26 @@ class BinomialHeap:
         
         to_remove = self.trees[self.min_tree_rank]
         self.trees[to_remove.rank] = None
-        self.elements = self.elements - 2 ** to_remove.rank        
+        self.elements -= 1
 
         for child in to_remove.children:
             child.parent = None
             self.__add_tree(child)
-            
-        self.min_key = self.infinity
-        for tree in self.trees:
-            if tree is not None:
-                if tree.item.key <= self.min_key:
-                    self.min_key = tree.item.key
-                    self.min_value = tree.item.value
-                    self.min_tree_rank = tree.rank
-        
+
+        self.__update_min()
+
         return to_remove.item
                     
     def decreasekey(self, node, newkey):
-        """ Change the node key to newkey. """
+        """ Change the node key to newkey. The minimum only changes when newkey
+        is below it, and then the item has moved up to the root of its tree. """
         updateref = node.tree.decrease(newkey)
-        
-        self.min_key = self.infinity
-        for tree in self.trees:
-            if tree is not None:
-                if tree.item.key <= self.min_key:
-                    self.min_key = tree.item.key
-                    self.min_value = tree.item.value
-                    self.min_tree_rank = tree.rank        
-        
+
+        if newkey < self.min_key:
+            self.min_key = newkey
+            self.min_value = node.value
+            self.min_tree_rank = updateref.rank
+
         return updateref
  
     def __str__(self):
@@ -151,6 +176,9 @@ class BinomialHeap:
         
 
 def test():
+    """ Test Binomial heap """
+    import math
+    import random
     bh1 = BinomialHeap()
     bh1.insert(12,"a")
     bh1.insert(5,"b")
@@ -159,17 +187,52 @@ def test():
     iteme = bh1.insert(100,"e")
     print(bh1)
     print("min item: ", bh1.min_value)
+    assert bh1.min_value == "b"
     
     print("\n")
-    bh1.extractmin()
+    assert bh1.extractmin().key == 5
     print(bh1)
     print("min item: ", bh1.min_value)
     
     bh1.decreasekey(iteme, 1)
     print(bh1)
     
-    bh1.extractmin()
+    assert bh1.extractmin().key == 1
     print(bh1)
+    keys = []
+    while len(bh1):
+        keys.append(bh1.extractmin().key)
+    assert keys == [8, 12, 21]
+
+    # inf keys (the initial keys of Prim), in bulk and one at a time
+    bh2 = BinomialHeap()
+    items = bh2.build([math.inf] * 6, range(6))
+    bh2.insert(math.inf, 6)
+    bh2.decreasekey(items[4], 3)
+    assert bh2.extractmin().value == 4
+    assert [bh2.extractmin().key for _ in range(6)] == [math.inf] * 6
+    assert len(bh2) == 0
+
+    # random operations with inf keys and ties, against the keys left
+    for seed in range(200):
+        rng = random.Random(seed)
+        heap = BinomialHeap()
+        keys = [rng.choice([math.inf, rng.randint(0, 20)]) for _ in range(rng.randint(0, 30))]
+        items = dict(enumerate(heap.build(keys, range(len(keys)))))
+        for step in range(len(keys), len(keys) + 200):
+            op = rng.random()
+            if op < 0.4 or not items:
+                items[step] = heap.insert(rng.choice([math.inf, rng.randint(0, 20)]), step)
+            elif op < 0.7:
+                item = items[rng.choice(list(items))]
+                key = rng.randint(0, 20)
+                if key < item.key:
+                    heap.decreasekey(item, key)
+            else:
+                item = heap.extractmin()
+                assert item.key == min(i.key for i in items.values())
+                del items[item.value]
+            assert len(heap) == len(items)
 
         
 if __name__ == '__main__':
@@ -0,0 +1,232 @@
+import atexit
+import multiprocessing
+import weakref
+import numpy as np
+import disjoint_set as ds
+import timing
+from mst_result import MSTResult
+
+# Borůvka's algorithm over the edge arrays of a CSRGraph. Each round finds the
+# cheapest edge leaving every component with segmented minimums (ufunc.at over
+# the component ids), adds all of them to the tree and contracts the components
+# with a batch union. Ties are broken by edge id, so the chosen edges never
+# close a cycle. There are at most log2(n) rounds.
+#
+# With jobs > 1 the scan of each round is split among a process pool. The edge
+# arrays and the component id of every node live in shared memory, and each
+# worker returns the cheapest edges of its slice of the edges. The shared
+# blocks of a graph (SharedEdges) and the pool (kept for the whole process)
+# are set up before the call, so a timed run measures only the rounds. The
+# pool cannot be started inside a daemonic process (e.g. a test worker).
+
+NO_EDGE = np.iinfo(np.int64).max
+
+
+def cheapest_edges(cu, cv, weight, eids, n):
+    """ For the edges eids with endpoints in the components cu and cv (cu !=
+    cv), returns the components that have an outgoing edge, and the weight
+    and id of the cheapest one. """
+    best_w = np.full(n, np.inf)
+    np.minimum.at(best_w, cu, weight)
+    np.minimum.at(best_w, cv, weight)
+
+    # among the edges of minimum weight, the one with the smallest id
+    best_e = np.full(n, NO_EDGE, dtype=np.int64)
+    at_u = weight == best_w[cu]
+    at_v = weight == best_w[cv]
+    np.minimum.at(best_e, cu[at_u], eids[at_u])
+    np.minimum.at(best_e, cv[at_v], eids[at_v])
+
+    comps = np.flatnonzero(best_e != NO_EDGE)
+    return comps, best_w[comps], best_e[comps]
+
+
+def merge_cheapest(parts, n):
+    """ Merges the (components, weights, edges) results of several slices. """
+    comps = np.concatenate([p[0] for p in parts])
+    weight = np.concatenate([p[1] for p in parts])
+    eids = np.concatenate([p[2] for p in parts])
+    best_w = np.full(n, np.inf)
+    np.minimum.at(best_w, comps, weight)
+    best_e = np.full(n, NO_EDGE, dtype=np.int64)
+    at = weight == best_w[comps]
+    np.minimum.at(best_e, comps[at], eids[at])
+    return np.unique(best_e[best_e != NO_EDGE])
+
+
+def boruvka(csr, jobs=1):
+    """ Borůvka's algorithm for finding a minimum spanning tree (a forest if
+    the graph is not connected). jobs > 1 splits the scan of each round among
+    that many processes, and jobs = 0 uses one per core. """
+    if jobs == 0:
+        jobs = multiprocessing.cpu_count()
+    if jobs > 1:
+        shared = SharedEdges(csr, jobs)
+        try:
+            return boruvka_parallel(csr, shared)
+        finally:
+            shared.close()
+
+    n = csr.n
+    uf = ds.ArrayDisjointSets(n)
+    src, dst, weight = csr.src, csr.dst, csr.weight
+    eids = np.arange(csr.m)
+    selected = []
+    rounds = examined = 0
+
+    with timing.phase("greedy"):
+        while uf.count > 1:
+            examined += len(src)
+            cu = uf.find_many(src)
+            cv = uf.find_many(dst)
+
+            # contraction: the edges inside a component are dropped for good
+            live = cu != cv
+            if not live.any():
+                break
+            src, dst, weight, eids = src[live], dst[live], weight[live], eids[live]
+            cu, cv = cu[live], cv[live]
+
+            edges = np.unique(cheapest_edges(cu, cv, weight, eids, n)[2])
+            selected.append(edges)
+            uf.union_many(csr.src[edges], csr.dst[edges])
+            rounds += 1
+    timing.record("rounds", rounds)
+    timing.record("examined", examined)
+
+    return MSTResult.from_ids(csr, np.concatenate(selected) if selected else eids[:0])
+
+
+# Process pools of the parallel version, by number of jobs
+_pools = {}
+
+
+def worker_pool(jobs):
+    """ Returns the pool of jobs processes, started on the first call and
+    kept until the process exits. """
+    if jobs not in _pools:
+        if multiprocessing.current_process().daemon:
+            raise RuntimeError("the parallel Borůvka cannot run inside a daemonic process")
+        # the workers share the resource tracker of this process, so the blocks
+        # they attach are not seen as leaked when they exit
+        from multiprocessing import resource_tracker
+        resource_tracker.ensure_running()
+        pool = multiprocessing.Pool(jobs)
+        atexit.register(pool.terminate)
+        _pools[jobs] = pool
+    return _pools[jobs]
+
+
+def release(shms):
+    """ Frees shared memory blocks. """
+    for shm in shms:
+        shm.close()
+        shm.unlink()
+
+
+class SharedEdges:
+    """ The edge arrays of a CSRGraph and the component id of every node in
+    shared memory, and the pool that scans them. The blocks are freed by
+    close(), or when the object is collected. """
+    def __init__(self, csr, jobs=0):
+        from multiprocessing import shared_memory
+        self.jobs = jobs or multiprocessing.cpu_count()
+        self.pool = worker_pool(self.jobs)
+
+        arrays = {"src": csr.src, "dst": csr.dst,
+                  "weight": csr.weight.astype(np.float64),
+                  "comp": np.arange(csr.n, dtype=np.int64)}
+        shms = []
+        self.close = weakref.finalize(self, release, shms)
+        self.blocks = []
+        for name, values in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+            shms.append(shm)
+            np.ndarray(len(values), dtype=values.dtype, buffer=shm.buf)[:] = values
+            self.blocks.append((name, shm.name, values.dtype.str, len(values)))
+        self.comp = np.ndarray(csr.n, dtype=np.int64, buffer=shms[-1].buf)
+        self.blocks = tuple(self.blocks)
+
+
+# Shared arrays of a worker of the parallel version
+_shared = {}
+
+
+def attach(blocks):
+    """ Maps the shared memory blocks to arrays in a worker, unless they are
+    already mapped. blocks are (name, shm name, dtype, length) tuples. """
+    from multiprocessing import shared_memory
+    if _shared.get("blocks") == blocks:
+        return
+    for shm in _shared.pop("shms", []):
+        shm.close()
+    _shared.clear()
+    shms = []
+    for name, shm_name, dtype, length in blocks:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        shms.append(shm) # keeps the mapping alive
+        _shared[name] = np.ndarray(length, dtype=dtype, buffer=shm.buf)
+    _shared["shms"] = shms
+    _shared["blocks"] = blocks
+
+
+def scan_slice(task):
+    """ Worker task: cheapest outgoing edge of each component among the edges
+    in the slice (start, end) of the shared blocks. """
+    blocks, start, end, n = task
+    attach(blocks)
+    comp = _shared["comp"]
+    cu = comp[_shared["src"][start:end]]
+    cv = comp[_shared["dst"][start:end]]
+    live = cu != cv
+    weight = _shared["weight"][start:end][live]
+    eids = np.arange(start, end)[live]
+    return cheapest_edges(cu[live], cv[live], weight, eids, n)
+
+
+def boruvka_parallel(csr, shared):
+    """ Borůvka's algorithm with the scan of each round split among the pool
+    of shared (a SharedEdges of csr). """
+    n, m = csr.n, csr.m
+    uf = ds.ArrayDisjointSets(n)
+    step = -(-m // shared.jobs) if m else 1
+    slices = [(shared.blocks, start, min(start + step, m), n) for start in range(0, m, step)]
+    selected = []
+    rounds = examined = 0
+
+    with timing.phase("greedy"):
+        while uf.count > 1:
+            shared.comp[:] = uf.find_many(np.arange(n))
+            examined += m
+            edges = merge_cheapest(shared.pool.map(scan_slice, slices), n)
+            if len(edges) == 0:
+                break
+            selected.append(edges)
+            uf.union_many(csr.src[edges], csr.dst[edges])
+            rounds += 1
+    timing.record("rounds", rounds)
+    timing.record("examined", examined)
+
+    return MSTResult.from_ids(csr, np.concatenate(selected) if selected else np.zeros(0, np.int64))
+
+
+def test():
+    """ Checks the MST weight against Kruskal """
+    from csr_graph import CSRGraph
+    import aycc
+    rng = np.random.default_rng(1)
+    for n, m in ((10, 30), (300, 5000), (2000, 50000)):
+        u = rng.integers(0, n, m)
+        v = rng.integers(0, n, m)
+        keep = u != v
+        csr = CSRGraph(range(n), u[keep], v[keep], rng.integers(1, 11, keep.sum()).astype(float))
+        expected = aycc.kruskal_csr(csr)
+        for jobs in (1, 2):
+            mst = boruvka(csr, jobs)
+            assert mst.total_weight == expected.total_weight
+            assert len(mst) == len(expected)
+    print("ok")
+
+
+if __name__ == '__main__':
+    test()
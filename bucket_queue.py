@@ -0,0 +1,267 @@
+# Integer priority queues with buckets: Dial's bucket queue (an array with a
+# bucket per key) and a radix heap (a bucket per bit of the key), with the
+# insert/extractmin/decreasekey interface of dary_heap.Heap. The keys are non
+# negative integers (or inf). A bucket is a set of items and the item knows
+# the index of its bucket, so decreasekey moves it to the bucket of its new
+# key in O(1).
+#
+# Both queues are usually monotone (Dijkstra): the keys never go below the last
+# extracted one. The keys of Prim's algorithm are edge weights, and an edge
+# lighter than the last one extracted is common, so here a key under the
+# current minimum is allowed: Dial's cursor goes back to it, and the radix heap
+# moves its low buckets up to make room for it (see RadixHeap.rebase).
+#
+# The keys are not checked on each operation: auto_queue checks the edge weights
+# of the graph once, before the queue is used, and picks Dial's queue for small
+# weights and the radix heap for the larger ones.
+
+DIAL_MAX_WEIGHT = 4096 # max weight for Dial's buckets (one bucket per key)
+
+INF = float("inf")
+
+
+class BucketItem():
+    """ Represents an item in the queue """
+    __slots__ = ("key", "value", "bucket")
+
+    def __init__(self, key, value, bucket):
+        self.key = key
+        self.value = value
+        self.bucket = bucket # index of the bucket with the item
+
+    def __str__(self):
+        return "key: %s value: %s" % (self.key, self.value)
+
+
+class DialQueue():
+    """ Dial's bucket queue: buckets[k] holds the items with key k, for keys up
+    to maxkey, and buckets[maxkey + 1] the items with a larger key, which are
+    all taken as infinite (e.g. the initial distances of Prim). cursor is a
+    lower bound of the keys in the queue, so extractmin takes an item of the
+    first non empty bucket from cursor, in O(maxkey) at worst. """
+
+    def __init__(self, maxkey):
+        self.maxkey = int(maxkey)
+        self.buckets = [set() for _ in range(self.maxkey + 2)]
+        self.cursor = 0
+        self.elements = 0
+
+    def __len__(self):
+        return self.elements
+
+    def findmin(self):
+        """ Return the item with the smallest key, or None if queue is empty """
+        if self.elements == 0:
+            return None
+        buckets = self.buckets
+        c = self.cursor
+        while not buckets[c]:
+            c += 1
+        self.cursor = c
+        return next(iter(buckets[c]))
+
+    def extractmin(self):
+        """ Delete the item with the smallest key and return it """
+        if self.elements == 0:
+            return None
+        buckets = self.buckets
+        c = self.cursor
+        while not buckets[c]:
+            c += 1
+        self.cursor = c
+        self.elements -= 1
+        return buckets[c].pop()
+
+    def insert(self, key, value):
+        """ Insert value with the given key """
+        k = int(key) if key <= self.maxkey else self.maxkey + 1
+        item = BucketItem(key, value, k)
+        self.buckets[k].add(item)
+        if k < self.cursor:
+            self.cursor = k
+        self.elements += 1
+        return item
+
+    def decreasekey(self, item, newkey):
+        """ Move item to the bucket of newkey """
+        k = int(newkey) if newkey <= self.maxkey else self.maxkey + 1
+        buckets = self.buckets
+        buckets[item.bucket].remove(item)
+        buckets[k].add(item)
+        item.key = newkey
+        item.bucket = k
+        if k < self.cursor:
+            self.cursor = k
+
+
+class RadixHeap():
+    """ Radix heap (Ahuja, Mehlhorn, Orlin and Tarjan, 1990): buckets[i] holds
+    the items whose key differs from last (the last extracted key, a lower
+    bound of the keys in the heap) in bit i - 1 and above, but not in higher
+    bits. So buckets[0] holds the keys equal to last, and the keys in a bucket
+    are smaller than the keys in the next one. extractmin sets last to the
+    minimum of the first non empty bucket and spreads that bucket over the
+    lower ones. The items with key inf are in the last bucket. """
+
+    def __init__(self, bits=64):
+        self.buckets = [set() for _ in range(bits + 2)]
+        self.infinite = bits + 1
+        self.last = 0
+        self.elements = 0
+
+    def __len__(self):
+        return self.elements
+
+    def bucket(self, key):
+        """ Index of the bucket of key, lowering last if key is under it """
+        if key == INF:
+            return self.infinite
+        k = int(key)
+        if k < self.last:
+            self.rebase(k)
+        return (k ^ self.last).bit_length()
+
+    def rebase(self, last):
+        """ Lowers last. If the highest bit where last and the old last differ
+        is bit b - 1, every key in buckets 0..b - 1 moves to bucket b (which is
+        empty, as no key is under the old last), and the higher buckets do not
+        change. """
+        b = (last ^ self.last).bit_length()
+        buckets = self.buckets
+        target = buckets[b]
+        for i in range(b):
+            for item in buckets[i]:
+                item.bucket = b
+            target |= buckets[i]
+            buckets[i] = set()
+        self.last = last
+
+    def settle(self):
+        """ Makes buckets[0] (or the infinite bucket, if it is the only one
+        left) hold the minimum, and returns its index """
+        buckets = self.buckets
+        if buckets[0]:
+            return 0
+        for i in range(1, self.infinite):
+            if buckets[i]:
+                break
+        else:
+            return self.infinite
+        # spread the bucket over the lower ones
+        items = buckets[i]
+        buckets[i] = set()
+        last = self.last = min(int(item.key) for item in items)
+        for item in items:
+            b = item.bucket = (int(item.key) ^ last).bit_length()
+            buckets[b].add(item)
+        return 0
+
+    def findmin(self):
+        """ Return the item with the smallest key, or None if heap is empty """
+        if self.elements == 0:
+            return None
+        return next(iter(self.buckets[self.settle()]))
+
+    def extractmin(self):
+        """ Delete the item with the smallest key and return it """
+        if self.elements == 0:
+            return None
+        self.elements -= 1
+        return self.buckets[self.settle()].pop()
+
+    def insert(self, key, value):
+        """ Insert value with the given key """
+        k = self.bucket(key)
+        item = BucketItem(key, value, k)
+        self.buckets[k].add(item)
+        self.elements += 1
+        return item
+
+    def decreasekey(self, item, newkey):
+        """ Move item to the bucket of newkey """
+        self.buckets[item.bucket].remove(item)
+        k = item.bucket = self.bucket(newkey)
+        self.buckets[k].add(item)
+        item.key = newkey
+
+
+def max_integer_weight(graph):
+    """ Max edge weight of graph. Raises ValueError if the weights are not non
+    negative integers. """
+    maxkey = 0
+    for _, _, data in graph.edges(data=True):
+        w = data['weight']
+        if w < 0 or w != int(w):
+            raise ValueError("Edge weights must be non negative integers: {}".format(w))
+        maxkey = max(maxkey, w)
+    return int(maxkey)
+
+
+def auto_queue(graph, threshold=DIAL_MAX_WEIGHT):
+    """ Queue for the edge weights of graph: Dial's buckets if the max weight
+    is up to threshold, a radix heap otherwise. Raises ValueError if the
+    weights are not non negative integers. """
+    maxkey = max_integer_weight(graph)
+    if maxkey <= threshold:
+        return DialQueue(maxkey)
+    return RadixHeap()
+
+
+def test():
+    """ Test Dial's queue and the radix heap """
+    import random
+    for heap in [DialQueue(30), RadixHeap()]:
+        heap.insert(10,1)
+        heap.insert(9,2)
+        heap.insert(2,3)
+        heap.insert(12,4)
+        item = heap.insert(17,5)
+        heap.insert(4,6)
+        heap.insert(INF,7)
+        heap.insert(22,8)
+        assert heap.extractmin().key == 2
+        heap.insert(8,9)
+        heap.insert(11,10)
+        heap.insert(1,11)
+        assert heap.extractmin().key == 1
+        heap.decreasekey(item, 3)
+        keys = []
+        while heap.findmin() is not None:
+            keys.append(heap.extractmin().key)
+        assert keys == [3, 4, 8, 9, 10, 11, 12, 22, INF]
+        assert len(heap) == 0
+
+    # random operations, with keys under the minimum
+    rng = random.Random(1)
+    for heap in [DialQueue(60), RadixHeap()]:
+        items = {}
+        for step in range(5000):
+            op = rng.random()
+            if op < 0.4 or not items:
+                items[step] = heap.insert(rng.randint(0, 60), step)
+            elif op < 0.7:
+                item = items[rng.choice(list(items))]
+                heap.decreasekey(item, rng.randint(0, item.key))
+            else:
+                item = heap.extractmin()
+                assert item.key == min(i.key for i in items.values())
+                del items[item.value]
+            assert len(heap) == len(items)
+
+    # queue chosen by the max weight
+    import networkx as nx
+    graph = nx.Graph()
+    graph.add_edge(1, 2, weight=DIAL_MAX_WEIGHT)
+    assert isinstance(auto_queue(graph), DialQueue)
+    graph.add_edge(2, 3, weight=DIAL_MAX_WEIGHT + 1)
+    assert isinstance(auto_queue(graph), RadixHeap)
+    graph.add_edge(3, 4, weight=0.5)
+    try:
+        auto_queue(graph)
+        assert False
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,103 @@
+import numpy as np
+
+# Compact graph core shared by the MST routines. The graph is stored once in
+# Compressed Sparse Row (CSR) form: the neighbors of node i are
+# adj[offsets[i]:offsets[i+1]], with the edge weights in adj_weight. Nodes are
+# dense integer ids 0..n-1; labels[i] is the original label of node i.
+
+class CSRGraph:
+    """ Undirected weighted graph in CSR form, with a label <-> id map. """
+
+    def __init__(self, labels, src, dst, weight):
+        """ Builds the graph from the edge arrays src, dst (node ids) and
+        weight, with each undirected edge given once. labels[i] is the label
+        of the node with id i. """
+        self.labels = list(labels)
+        self.index = {x: i for i, x in enumerate(self.labels)}
+        self.n = len(self.labels)
+        self.m = len(src)
+
+        # edge list, each edge once
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.weight = np.asarray(weight)
+
+        # both directions of each edge, grouped by source node
+        heads = np.concatenate((self.src, self.dst))
+        tails = np.concatenate((self.dst, self.src))
+        order = np.argsort(heads, kind="stable")
+        self.adj = tails[order]
+        self.adj_weight = np.concatenate((self.weight, self.weight))[order]
+        self.offsets = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=self.n), out=self.offsets[1:])
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """ Converts a networkx graph. Edges without weight get weight 1. """
+        labels = list(graph.nodes())
+        index = {x: i for i, x in enumerate(labels)}
+        edges = graph.edges(data=True)
+        m = graph.number_of_edges()
+        src = np.empty(m, dtype=np.int64)
+        dst = np.empty(m, dtype=np.int64)
+        weight = np.empty(m, dtype=np.float64)
+        for i, (u, v, data) in enumerate(edges):
+            src[i] = index[u]
+            dst[i] = index[v]
+            weight[i] = data.get('weight', 1)
+        return cls(labels, src, dst, weight)
+
+    @classmethod
+    def from_arrays(cls, u, v, weight):
+        """ Builds the graph from arrays of node labels u, v and weights.
+        The labels must be sortable (e.g. the integer labels of an
+        .edgelist file). """
+        u = np.asarray(u)
+        v = np.asarray(v)
+        labels, ids = np.unique(np.concatenate((u, v)), return_inverse=True)
+        m = len(u)
+        return cls(labels.tolist(), ids[:m], ids[m:], weight)
+
+    @classmethod
+    def from_edgelist(cls, path, cache=True):
+        """ Reads a weighted .edgelist file ('u v weight' per line). """
+        import graph_io
+        edgelist = graph_io.load_edgelist(path, cache)
+        return cls.from_arrays(edgelist.u, edgelist.v, edgelist.weight)
+
+    def to_dense(self):
+        """ Returns the n x n adjacency matrix and the value used as <inf> for
+        non connected nodes. The matrix uses int32 when the weights are
+        integers that fit, float32 when they are exact in single precision, and
+        float64 otherwise. """
+        dtype, inf = matrix_dtype(self.weight)
+        mx = np.full((self.n, self.n), inf, dtype=dtype)
+        mx[self.src, self.dst] = self.weight
+        mx[self.dst, self.src] = self.weight
+        return mx, inf
+
+    def neighbors(self, i):
+        """ Returns the ids and weights of the neighbors of node id i. """
+        a, b = self.offsets[i], self.offsets[i + 1]
+        return self.adj[a:b], self.adj_weight[a:b]
+
+    def lists(self):
+        """ Returns offsets, adj and adj_weight as Python lists, which are
+        faster than NumPy arrays for element-by-element loops. """
+        return self.offsets.tolist(), self.adj.tolist(), self.adj_weight.tolist()
+
+
+
+def matrix_dtype(weight):
+    """ Smallest matrix type able to hold the weights, and its <inf> value.
+    For int32 the largest value is reserved as <inf>. """
+    weight = np.asarray(weight)
+    if len(weight) == 0:
+        return np.float32, np.inf
+    int32 = np.iinfo(np.int32)
+    if (np.array_equal(weight, np.round(weight)) and
+            int32.min <= weight.min() and weight.max() < int32.max):
+        return np.int32, int32.max
+    if np.array_equal(weight.astype(np.float32), weight):
+        return np.float32, np.inf
+    return np.float64, np.inf
@@ -1,4 +1,5 @@
 import math
+from array import array
 
 # The code is based on from http://www.cs.cmu.edu/~ckingsf/class/02713-s13/src/mst.py
 
@@ -71,7 +72,7 @@ class Heap():
         """Return the position of the parent of pos"""
         if pos == 0: 
             return None
-        return int(math.ceil(pos / self.dary) - 1)
+        return (pos - 1) // self.dary
 
     def children(self, pos):
         """Return a list of children of pos"""
@@ -84,4 +85,164 @@ class Heap():
             if minkey == None or self.heap[c].key < minkey:
                 minkey, minpos = self.heap[c].key, c
         return minpos
-        
\ No newline at end of file
+        
+
+def auto_arity(n, m):
+    """ Arity suggested by the analysis of Prim's algorithm with a d-ary heap:
+    n extractmin at O(d log_d n) and m decreasekey at O(log_d n) are balanced
+    with d = m/n. """
+    return max(2, int(math.ceil(m / float(max(n, 1)))))
+
+
+# Indexed d-ary heap
+class IndexedHeap():
+    """ d-ary heap of vertex ids 0..n-1, without per-item objects. The heap is
+    kept in two flat typed arrays (the vertex ids and their keys, in heap
+    order), and pos[v] is the position of vertex v in the heap (-1 if absent).
+    The handle of a vertex is the vertex id itself. """
+    def __init__(self, n, dary=2):
+        self.dary = dary
+        self.heap = array('q')
+        self.keys = array('d')
+        self.pos = array('q', [-1]) * n
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, vertex):
+        return self.pos[vertex] >= 0
+
+    def heapify(self, keys, vertices=None):
+        """ Builds the heap in O(n) from the key of each vertex. keys[v] is the
+        key of vertex v; only the given vertices (all by default) are added. """
+        if vertices is None:
+            vertices = range(len(keys))
+        self.heap = array('q', vertices)
+        self.keys = array('d', (keys[v] for v in self.heap))
+        for i, v in enumerate(self.heap):
+            self.pos[v] = i
+        for i in range((len(self.heap) - 2) // self.dary, -1, -1):
+            self.siftdown(i, self.heap[i], self.keys[i])
+
+    def siftup(self, pos, vertex, key):
+        """ Move vertex up from pos until its parent has a smaller key. """
+        heap, keys, where, d = self.heap, self.keys, self.pos, self.dary
+        while pos > 0:
+            p = (pos - 1) // d
+            if keys[p] <= key:
+                break
+            heap[pos] = heap[p]
+            keys[pos] = keys[p]
+            where[heap[pos]] = pos
+            pos = p
+        heap[pos] = vertex
+        keys[pos] = key
+        where[vertex] = pos
+
+    def siftdown(self, pos, vertex, key):
+        """ Move vertex down from pos until its children have larger keys. """
+        heap, keys, where, d = self.heap, self.keys, self.pos, self.dary
+        size = len(heap)
+        c = d * pos + 1
+        while c < size:
+            # minimum child
+            minpos, minkey = c, keys[c]
+            for j in range(c + 1, min(c + d, size)):
+                if keys[j] < minkey:
+                    minpos, minkey = j, keys[j]
+            if minkey >= key:
+                break
+            heap[pos] = heap[minpos]
+            keys[pos] = minkey
+            where[heap[pos]] = pos
+            pos = minpos
+            c = d * pos + 1
+        heap[pos] = vertex
+        keys[pos] = key
+        where[vertex] = pos
+
+    def findmin(self):
+        """ Return the vertex with smallest key, or None if heap is empty """
+        return self.heap[0] if len(self.heap) > 0 else None
+
+    def extractmin(self):
+        """ Delete the vertex with the smallest key and return it """
+        if len(self.heap) == 0:
+            return None
+        vertex = self.heap[0]
+        self.pos[vertex] = -1
+        last = self.heap.pop()
+        lastkey = self.keys.pop()
+        if len(self.heap) > 0:
+            self.siftdown(0, last, lastkey)
+        return vertex
+
+    def insert(self, key, vertex):
+        """ Insert vertex with the given key """
+        self.heap.append(vertex)
+        self.keys.append(key)
+        self.siftup(len(self.heap) - 1, vertex, key)
+        return vertex
+
+    def decreasekey(self, vertex, newkey):
+        """ Decrease the key of vertex to newkey """
+        self.siftup(self.pos[vertex], vertex, newkey)
+
+
+# Binary heap of entries without handles
+class EntryHeap():
+    """ Binary heap of (key, vertex, parent) entries in three flat typed
+    arrays, with no per-item objects and no decreasekey: the entries that are
+    no longer needed are left in the heap, and skipped by the user when
+    popped (lazy deletion). """
+    def __init__(self):
+        self.keys = array('d')
+        self.vertices = array('q')
+        self.parents = array('q')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def push(self, entry):
+        """ Insert the (key, vertex, parent) entry """
+        key, vertex, parent = entry
+        keys, vertices, parents = self.keys, self.vertices, self.parents
+        keys.append(key)
+        vertices.append(vertex)
+        parents.append(parent)
+        pos = len(keys) - 1
+        while pos > 0:
+            p = (pos - 1) >> 1
+            if keys[p] <= key:
+                break
+            keys[pos] = keys[p]
+            vertices[pos] = vertices[p]
+            parents[pos] = parents[p]
+            pos = p
+        keys[pos] = key
+        vertices[pos] = vertex
+        parents[pos] = parent
+
+    def pop(self):
+        """ Delete the entry with the smallest key and return it """
+        keys, vertices, parents = self.keys, self.vertices, self.parents
+        entry = (keys[0], vertices[0], parents[0])
+        key, vertex, parent = keys.pop(), vertices.pop(), parents.pop()
+        size = len(keys)
+        if size == 0:
+            return entry
+        pos, c = 0, 1
+        while c < size:
+            if c + 1 < size and keys[c + 1] < keys[c]:
+                c += 1
+            if keys[c] >= key:
+                break
+            keys[pos] = keys[c]
+            vertices[pos] = vertices[c]
+            parents[pos] = parents[c]
+            pos = c
+            c = 2 * pos + 1
+        keys[pos] = key
+        vertices[pos] = vertex
+        parents[pos] = parent
+        return entry
@@ -1,19 +1,23 @@
 # Implementado según Brassard, sección 5.9
 
+from array import array
+import numpy as np
+
 class DisjointSets:
     def __init__(self, elements):
         self.elems = list(elements)
-        self.sets = list(range(len(elements)))
-        self.ranks = [1] * len(elements)
+        self.index = {x: i for i, x in enumerate(self.elems)}
+        self.sets = list(range(len(self.elems)))
+        self.ranks = [1] * len(self.elems)
 
     def find(self, x):
         """ Finds the label of the set containing object x. """
-        i = r = self.elems.index(x)
+        i = r = self.index[x]
 
         while self.sets[r] != r:
             # r is the root of the tree
             r = self.sets[r]
-                
+
         while i != r:
             j = self.sets[i]
             self.sets[i] = r
@@ -30,4 +34,189 @@ class DisjointSets:
             if self.ranks[a] > self.ranks[b]:
                 self.sets[b] = a
             else:
-                self.sets[a] = b
\ No newline at end of file
+                self.sets[a] = b
+
+
+class ArrayDisjointSets:
+    """ Compact union-find. The node labels are mapped once to dense integer
+    ids, and the parent and rank of each id are kept in typed arrays. The
+    find/merge methods have the same semantics as DisjointSets, and the
+    find_many/union_many methods work over NumPy arrays of ids. """
+
+    def __init__(self, elements):
+        """ elements is either an iterable of node labels or the number of
+        elements n (then the labels are the ids 0..n-1). """
+        if isinstance(elements, int):
+            self.elems = None
+            self.index = None
+            n = elements
+        else:
+            self.elems = list(elements)
+            self.index = {x: i for i, x in enumerate(self.elems)}
+            n = len(self.elems)
+        self.count = n # number of disjoint sets
+        self.sets = array('q', range(n))
+        self.ranks = array('b', bytes(n))
+        # zero-copy views used by the batch operations
+        self.parent = np.frombuffer(self.sets, dtype=np.int64) if n else np.zeros(0, np.int64)
+        self.rank = np.frombuffer(self.ranks, dtype=np.int8) if n else np.zeros(0, np.int8)
+
+    def __len__(self):
+        return len(self.sets)
+
+    def id(self, x):
+        """ Returns the dense integer id of the node label x. """
+        return x if self.index is None else self.index[x]
+
+    def ids(self, labels):
+        """ Returns a NumPy array with the dense ids of the labels. """
+        if self.index is None:
+            return np.asarray(labels, dtype=np.int64)
+        return np.fromiter((self.index[x] for x in labels), dtype=np.int64)
+
+    def find(self, x):
+        """ Finds the label of the set containing object x. """
+        sets = self.sets
+        i = r = x if self.index is None else self.index[x]
+
+        while sets[r] != r:
+            r = sets[r]
+
+        while i != r:
+            j = sets[i]
+            sets[i] = r
+            i = j
+
+        return r
+
+    def find_id(self, i):
+        """ Finds the label of the set containing the element with id i. """
+        sets = self.sets
+        r = i
+        while sets[r] != r:
+            r = sets[r]
+        while i != r:
+            j = sets[i]
+            sets[i] = r
+            i = j
+        return r
+
+    def merge(self, a, b):
+        """ Merges the sets labelled a and b; we assume a != b. """
+        ranks = self.ranks
+        self.count -= 1
+        if ranks[a] == ranks[b]:
+            ranks[a] += 1
+            self.sets[b] = a
+        elif ranks[a] > ranks[b]:
+            self.sets[b] = a
+        else:
+            self.sets[a] = b
+
+    def find_many(self, ids):
+        """ Finds the set labels for an array of element ids. Uses pointer
+        jumping and compresses the paths of all the given ids. """
+        ids = np.asarray(ids, dtype=np.int64)
+        parent = self.parent
+        roots = parent[ids]
+        while True:
+            up = parent[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = up
+        parent[ids] = roots
+        return roots
+
+    def union_many(self, a, b):
+        """ Merges the sets containing a[i] and b[i] for every i (arrays of
+        element ids). Returns the number of merges done. """
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        parent, rank = self.parent, self.rank
+        merges = 0
+        while len(a):
+            ra = self.find_many(a)
+            rb = self.find_many(b)
+            pending = ra != rb
+            if not pending.any():
+                break
+            ra, rb = ra[pending], rb[pending]
+            a, b = a[pending], b[pending]
+
+            # link the smaller root into the larger one, ordered by (rank, id)
+            # so the links of a batch never form a cycle
+            ka, kb = rank[ra], rank[rb]
+            swap = (ka > kb) | ((ka == kb) & (ra > rb))
+            child = np.where(swap, rb, ra)
+            root = np.where(swap, ra, rb)
+            parent[child] = root
+
+            # count each linked child once; a child may get several parents in
+            # the batch, only the last write survives
+            linked = np.unique(child)
+            merges += len(linked)
+            tied = rank[child] == rank[root]
+            np.maximum.at(rank, parent[child[tied]], rank[child[tied]] + 1)
+
+        self.count -= merges
+        return merges
+
+
+def benchmark(sizes=(10**3, 10**4, 10**5, 10**6, 10**7), seed=0):
+    """ Scaling benchmark: n random unions followed by a find of every element,
+    both with the batch API and with the single-element API. """
+    import time
+    rng = np.random.default_rng(seed)
+    print("n\tunion_many\tfind_many\tmerge/find")
+    for n in sizes:
+        a = rng.integers(0, n, n)
+        b = rng.integers(0, n, n)
+
+        uf = ArrayDisjointSets(n)
+        t = time.perf_counter()
+        uf.union_many(a, b)
+        t_union = time.perf_counter() - t
+        t = time.perf_counter()
+        uf.find_many(np.arange(n))
+        t_find = time.perf_counter() - t
+
+        # the scalar loop is too slow past 10^6 elements
+        t_scalar = float("nan")
+        if n <= 10**6:
+            uf = ArrayDisjointSets(n)
+            t = time.perf_counter()
+            for x, y in zip(a.tolist(), b.tolist()):
+                u = uf.find(x)
+                v = uf.find(y)
+                if u != v:
+                    uf.merge(u, v)
+            t_scalar = time.perf_counter() - t
+
+        print("{0}\t{1:.4f}\t{2:.4f}\t{3:.4f}".format(n, t_union, t_find, t_scalar))
+
+
+def test():
+    """ Checks the batch API against the single-element API """
+    rng = np.random.default_rng(1)
+    n = 1000
+    a = rng.integers(0, n, 700)
+    b = rng.integers(0, n, 700)
+    uf1 = ArrayDisjointSets(n)
+    uf2 = DisjointSets(range(n))
+    merges = uf1.union_many(a, b)
+    for x, y in zip(a, b):
+        u, v = uf2.find(x), uf2.find(y)
+        if u != v:
+            uf2.merge(u, v)
+    roots1 = uf1.find_many(np.arange(n))
+    roots2 = [uf2.find(x) for x in range(n)]
+    assert len(set(roots1.tolist())) == len(set(roots2)) == uf1.count
+    assert merges == n - uf1.count
+    for x, y in zip(rng.integers(0, n, 200), rng.integers(0, n, 200)):
+        assert (roots1[x] == roots1[y]) == (roots2[x] == roots2[y])
+    print("ok")
+
+
+if __name__ == '__main__':
+    test()
+    benchmark()
@@ -0,0 +1,215 @@
+import os
+import sys
+import tempfile
+import numpy as np
+import disjoint_set as ds
+from mst_result import MSTBuilder
+from graph_io import EDGE_DTYPE, parse_edges, parse_header
+from argparse import ArgumentParser   # Command line argument parser
+
+# External-memory Kruskal for edge lists larger than RAM. The .edgelist file is
+# streamed in chunks; each chunk is sorted by weight and written to a temporary
+# binary run. The runs are then merged (k-way, a block of each run at a time)
+# into the greedy loop of Kruskal, over a union-find indexed by node label.
+# When there are too many runs for a block of each to fit in the budget, groups
+# of runs are first merged into longer runs (merge_pass), as many times as
+# needed. Memory use depends on the budget and on the number of nodes, not on
+# the number of edges.
+
+DEFAULT_MEMORY = 256 * 2**20 # bytes
+MIN_BLOCK = 1024             # min edges read from a run at a time
+
+
+def read_chunks(path, chunk_bytes):
+    """ Streams an .edgelist file. Returns the header dictionary and a
+    generator of EDGE_DTYPE arrays parsed from about chunk_bytes of text. """
+    fp = open(path, "rb")
+
+    # header lines are at the top of the file
+    comments = []
+    pos = fp.tell()
+    line = fp.readline()
+    while line.startswith(b"#"):
+        comments.append(line.decode().rstrip())
+        pos = fp.tell()
+        line = fp.readline()
+    fp.seek(pos)
+
+    def chunks():
+        with fp:
+            rest = b""
+            while True:
+                data = fp.read(chunk_bytes)
+                if not data:
+                    break
+                data = rest + data
+                cut = data.rfind(b"\n") + 1
+                rest = data[cut:]
+                if cut:
+                    yield parse_edges(data[:cut], path)
+            if rest.strip():
+                yield parse_edges(rest, path)
+
+    return parse_header(comments), chunks()
+
+
+def make_runs(chunks, run_dir):
+    """ Sorts each chunk of edges by weight and writes it to a binary run file
+    in run_dir. Returns the run paths, the largest node label and the number
+    of nodes seen. """
+    runs = []
+    seen = np.zeros(0, dtype=bool) # node labels seen
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        top = int(max(chunk['u'].max(), chunk['v'].max())) + 1
+        if top > len(seen):
+            seen = np.concatenate((seen, np.zeros(max(top, 2 * len(seen)) - len(seen), dtype=bool)))
+        seen[chunk['u']] = True
+        seen[chunk['v']] = True
+
+        chunk = chunk[np.argsort(chunk['weight'], kind="stable")]
+        path = os.path.join(run_dir, "run{0}.bin".format(len(runs)))
+        chunk.tofile(path)
+        runs.append(path)
+    labels = np.flatnonzero(seen)
+    max_label = int(labels[-1]) if len(labels) else -1
+    return runs, max_label, len(labels)
+
+
+def merge_runs(runs, block):
+    """ k-way merge of sorted runs. Yields blocks of edges in increasing weight
+    order, reading at most block edges of each run at a time. """
+    readers = [open(path, "rb") for path in runs]
+    try:
+        buffers = [np.fromfile(fp, EDGE_DTYPE, count=block) for fp in readers]
+        while True:
+            active = [i for i, buf in enumerate(buffers) if len(buf)]
+            if not active:
+                break
+            # every edge up to the smallest buffer tail can be emitted: the
+            # rest of each run is at least as heavy as its buffer tail
+            bound = min(buffers[i]['weight'][-1] for i in active)
+            parts = []
+            for i in active:
+                k = np.searchsorted(buffers[i]['weight'], bound, side="right")
+                parts.append(buffers[i][:k])
+                buffers[i] = buffers[i][k:]
+                if len(buffers[i]) == 0:
+                    buffers[i] = np.fromfile(readers[i], EDGE_DTYPE, count=block)
+            out = np.concatenate(parts)
+            yield out[np.argsort(out['weight'], kind="stable")]
+    finally:
+        for fp in readers:
+            fp.close()
+
+
+def merge_pass(runs, memory, fan_in, run_dir):
+    """ Merges each group of fan_in runs into a new run in run_dir, and
+    deletes the old runs. Returns the paths of the new runs. """
+    merged = []
+    for start in range(0, len(runs), fan_in):
+        group = runs[start:start + fan_in]
+        block = max(MIN_BLOCK, memory // (2 * EDGE_DTYPE.itemsize * len(group)))
+        path = os.path.join(run_dir, "merge{0}.bin".format(len(merged)))
+        # the new run may reuse the name of an old one; write it aside first
+        with open(path + ".tmp", "wb") as fp:
+            for edges in merge_runs(group, block):
+                edges.tofile(fp)
+        for old in group:
+            os.remove(old)
+        os.replace(path + ".tmp", path)
+        merged.append(path)
+    return merged
+
+
+def kruskal_external(path, memory=DEFAULT_MEMORY, tmpdir=None):
+    """ Kruskal's algorithm on the .edgelist file at path with about memory
+    bytes for the edges (plus O(n) for the union-find). The runs are written
+    in a temporary directory under tmpdir. Returns the MSTResult of the
+    minimum spanning tree. """
+    # text, parsed values, edges and their sorted copy of a chunk
+    chunk_bytes = max(2**16, memory // 6)
+    chunks = read_chunks(path, chunk_bytes)[1]
+
+    with tempfile.TemporaryDirectory(dir=tmpdir) as run_dir:
+        runs, max_label, n = make_runs(chunks, run_dir)
+        if not runs:
+            return MSTBuilder().result()
+
+        # a block of each run and the merged block fit in the budget
+        fan_in = max(2, memory // (2 * EDGE_DTYPE.itemsize * MIN_BLOCK))
+        while len(runs) > fan_in:
+            runs = merge_pass(runs, memory, fan_in, run_dir)
+
+        uf = ds.ArrayDisjointSets(max_label + 1)
+        block = max(MIN_BLOCK, memory // (2 * EDGE_DTYPE.itemsize * len(runs)))
+
+        mst = MSTBuilder()
+        for edges in merge_runs(runs, block):
+            # vectorized filter of the edges inside a component
+            u, v = edges['u'], edges['v']
+            keep = uf.find_many(u) != uf.find_many(v)
+            for a, b, w in zip(u[keep].tolist(), v[keep].tolist(), edges['weight'][keep].tolist()):
+                ra = uf.find_id(a)
+                rb = uf.find_id(b)
+                if ra != rb:
+                    mst.append(a, b, w)
+                    uf.merge(ra, rb)
+            if len(mst) == n - 1:
+                break
+
+    return mst.result()
+
+
+def get_args():
+    """ Parse arguments from the command line """
+    parser = ArgumentParser()
+    parser.add_argument("edgelist", help="Graph file (.edgelist)", type=str)
+    parser.add_argument("--memory", help="Memory budget for the edges, in MB", default=DEFAULT_MEMORY // 2**20, type=int)
+    parser.add_argument("--tmpdir", help="Directory for the temporary runs", default=None, type=str)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    mst = kruskal_external(args.edgelist, args.memory * 2**20, args.tmpdir)
+    print("|mst|={0} wmst={1}".format(len(mst), mst.total_weight), file=sys.stdout)
+
+
+def test():
+    """ Checks the MST weight against Kruskal at a few small budgets (with
+    many runs and merge passes), and that the peak memory is bounded by the
+    budget and not by the size of the file """
+    import tracemalloc
+    from csr_graph import CSRGraph
+    import aycc
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "test.edgelist")
+        for n, m in ((10, 30), (300, 5000), (2000, 200000)):
+            u = rng.integers(0, n, m)
+            v = rng.integers(0, n, m)
+            keep = u != v
+            u, v, w = u[keep], v[keep], rng.integers(1, 11, keep.sum())
+            np.savetxt(path, np.column_stack((u, v, w)), fmt="%d",
+                       header="Numero de nodos: {0}".format(n), comments="# ")
+            expected = aycc.kruskal_csr(CSRGraph.from_arrays(u, v, w.astype(float)))
+            for memory in (2**16 * 6, 2**20, 2**24):
+                mst = kruskal_external(path, memory, tmpdir)
+                assert mst.total_weight == expected.total_weight
+                assert len(mst) == len(expected)
+
+        # the last file is several times the smallest budget
+        memory = 2**16 * 6
+        assert os.path.getsize(path) > 4 * memory
+        tracemalloc.start()
+        kruskal_external(path, memory, tmpdir)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert peak < 8 * memory, peak
+    print("ok")
+
+
+if __name__ == '__main__':
+    main()
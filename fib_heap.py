@@ -1,191 +1,264 @@
-# Fibonacci heap -- we have used some of the pseudocode at: 
+# Fibonacci heap -- we have used some of the pseudocode at:
 # http://www.cs.princeton.edu/~wayne/cs423/fibonacci/FibonacciHeapAlgorithm.html
+# and the description in Cormen et al., `Introduction to Algorithms', ch. 19.
+#
+# The root list and the children of each node are circular doubly-linked lists,
+# so insert, merge, cut and link are O(1). extractmin consolidates the roots
+# with an array indexed by degree.
 
 class LinkError(Exception): pass
 
-# Heap item
-class HeapItem(object):
-    """ Represents an item in the heap. """
-    def __init__(self, key, item):
-        self.key = key
-        self.pos = None
-        self.item = item        
-        
 
 class HeapNode():
     """ Represents a node in the heap """
+    __slots__ = ("key", "value", "parent", "child", "left", "right", "degree", "marked")
+
     def __init__(self, key, value):
-        self.nodedegree = 0
         self.key = key
         self.value = value
-        self.children = []
         self.parent = None
+        self.child = None   # any of the children
+        self.left = self    # siblings in a circular list
+        self.right = self
+        self.degree = 0     # number of children
         self.marked = False
-        
+
+    def siblings(self):
+        """ Iterates over the circular list of siblings, starting at self. """
+        node = self
+        while True:
+            next_node = node.right # node may be moved while iterating
+            yield node
+            node = next_node
+            if node is self:
+                break
+
+    def children(self):
+        """ Returns the list of children of the node. """
+        return list(self.child.siblings()) if self.child is not None else []
+
     def link(self, othertree):
         """ Add other tree to the list of childrens. """
         if self.key > othertree.key:
             raise LinkError
-        self.children.append(othertree)
         othertree.parent = self
-        
-    def degree(self):
-        """ Returns the degree (number of children) of the node. """
-        return len(self.children)
-        
+        othertree.marked = False
+        if self.child is None:
+            othertree.left = othertree.right = othertree
+            self.child = othertree
+        else:
+            splice(self.child, othertree)
+        self.degree += 1
+
     def str(self, indent = 0):
         """ String representation of the node. """
         return (" " * indent +
-                "rank: %d key: %d value: %s (%s)" % (self.degree(), self.key, self.value, self.marked) +                
-                "\n" + "".join(child.str(indent + 2) for child in self.children)
+                "rank: %d key: %s value: %s (%s)" % (self.degree, self.key, self.value, self.marked) +
+                "\n" + "".join(child.str(indent + 2) for child in self.children())
                )
-    
+
     def __str__(self):
         return self.str()
-        
-        
+
+
+def splice(node, other):
+    """ Inserts the single node other at the right of node. """
+    other.left = node
+    other.right = node.right
+    node.right.left = other
+    node.right = other
+
+
+def unsplice(node):
+    """ Removes node from its circular list. """
+    node.left.right = node.right
+    node.right.left = node.left
+    node.left = node.right = node
+
+
 class FibonacciHeap():
-    """ Implements a Fibonacci Heap data structure. A Fibonacci heap is a 
-    collection of trees satisfying the minimum-heap property, that is, the key 
+    """ Implements a Fibonacci Heap data structure. A Fibonacci heap is a
+    collection of trees satisfying the minimum-heap property, that is, the key
     of a child is always greater than or equal to the key of the parent."""
-    
+
     def __init__(self, key=None, value=None):
         """ Cretes a new Fibonacci Heap. """
-        self.rootnodes = []
         self.minroot = None
         self.elements = 0
-        self.rootdegrees = {}
-        
+
         if key is not None and value is not None:
-            self.rootnodes.append(HeapNode(key, value))
-            self.minroot = self.rootnodes[0]
-            #self.rootdegrees.add(self.minroot.degree())
-        
+            self.insert(key, value)
+
+    def __len__(self):
+        return self.elements
+
+    @property
+    def rootnodes(self):
+        """ List of the roots of the heap trees. """
+        return list(self.minroot.siblings()) if self.minroot is not None else []
+
     def findmin(self):
         """ Return the pointer to the node containing the minimum key value. """
         return self.minroot
-        
+
+    def addroot(self, node):
+        """ Adds node to the root list and updates the minroot. """
+        if self.minroot is None:
+            node.left = node.right = node
+            self.minroot = node
+        else:
+            splice(self.minroot, node)
+            if node.key < self.minroot.key:
+                self.minroot = node
+
     def merge(self, otherheap):
-        """ The merge operation is implemented by concatenating the lists of 
+        """ The merge operation is implemented by concatenating the lists of
         tree roots of the two heaps. """
-        self.rootnodes.extend(otherheap.rootnodes)
-        
+        other = otherheap.minroot
+        if other is None:
+            return
         if self.minroot is None:
-            self.minroot = self.rootnodes[0]
-        
-        # updates the minroot and degree list
-        for root in self.rootnodes:
-            if root.key <= self.minroot.key:
-                self.minroot = root
-        
+            self.minroot = other
+        else:
+            # join the two circular lists
+            a, b = self.minroot.right, other.left
+            self.minroot.right = other
+            other.left = self.minroot
+            a.left = b
+            b.right = a
+            if other.key < self.minroot.key:
+                self.minroot = other
+        self.elements += otherheap.elements
+        otherheap.minroot = None
+        otherheap.elements = 0
+
     def insert(self, key, value):
-        """ The insert operation works by creating a new heap with one element 
-        and doing merge. """
-        newheap = FibonacciHeap(key, value)
-        self.merge(newheap)
-        return newheap.minroot
-        
+        """ Adds a new one-node tree to the root list. """
+        node = HeapNode(key, value)
+        self.addroot(node)
+        self.elements += 1
+        return node
+
     def extractmin(self):
-        """ We take the root containing the minimum element and remove it. Its 
+        """ We take the root containing the minimum element and remove it. Its
         children will become roots of new trees. """
-        min_root = self.minroot        
-        
-        for child in min_root.children:
-            self.rootnodes.append(child)
+        min_root = self.minroot
+        if min_root is None:
+            return None
+
+        for child in min_root.children():
             child.parent = None
-        
-        self.rootnodes.remove(min_root)
-        
-        # successively linking together roots of the same degree
-        for _ in range(len(self.rootnodes)):
-            for root1 in self.rootnodes:
-                for root2 in self.rootnodes:
-                    if root1 != root2:
-                        if root1.degree() == root2.degree():
-                            if root1.key <= root2.key:                            
-                                root1.link(root2)
-                                self.rootnodes.remove(root2)
-                            else:
-                                root2.link(root1)
-                                self.rootnodes.remove(root1)                            
-                                break
-                            
-        # updates the minroot    
-        if self.rootnodes:
-            self.minroot = self.rootnodes[0]
-            for root in self.rootnodes:
-                if root.key <= self.minroot.key:
-                    self.minroot = root
-        else:
+            splice(min_root, child)
+        min_root.child = None
+
+        if min_root.right is min_root:
             self.minroot = None
-            
-        return min_root    
-            
-    def link(self, y, x):        
-        # make y a child of x
-        x.link(y)
-        # remove y from the root list
-        self.rootnodes.remove(y)
-        y.marked = False        
-         
+        else:
+            self.minroot = min_root.right
+            unsplice(min_root)
+            self.consolidate()
+        self.elements -= 1
+
+        return min_root
+
+    def consolidate(self):
+        """ Successively links together roots of the same degree, until every
+        root has a different degree, and finds the new minroot. """
+        degrees = [None] * 8
+        for root in list(self.minroot.siblings()):
+            x = root
+            d = x.degree
+            while d < len(degrees) and degrees[d] is not None:
+                y = degrees[d]
+                if y.key < x.key:
+                    x, y = y, x
+                unsplice(y)
+                x.link(y)
+                degrees[d] = None
+                d += 1
+            if d >= len(degrees):
+                degrees.extend([None] * (d + 1 - len(degrees)))
+            degrees[d] = x
+
+        # the remaining roots are still linked together; find the min
+        self.minroot = None
+        for root in degrees:
+            if root is not None and (self.minroot is None or root.key < self.minroot.key):
+                self.minroot = root
+
     def decreasekey(self, node, newkey):
+        """ Change the node key to newkey. """
         parent = node.parent
-        node.key = newkey        
+        node.key = newkey
         if parent is not None and node.key < parent.key:
             self.cutnode(node, parent)
             self.cascadecut(parent)
         if node.key < self.minroot.key:
             self.minroot = node
-        
+
     def cutnode(self, node, parent):
-        # remove node from the children list of its parent
-        parent.children.remove(node)
+        """ Moves node from the children list of parent to the root list. """
+        if node.right is node:
+            parent.child = None
+        else:
+            if parent.child is node:
+                parent.child = node.right
+            unsplice(node)
+        parent.degree -= 1
         # add the node to the heap root list
-        self.rootnodes.append(node)
         node.parent = None
+        splice(self.minroot, node)
         # now the node should be not marked
         node.marked = False
-        
+
     def cascadecut(self, node):
+        """ Cuts the marked ancestors of node. """
         parent = node.parent
-        if parent is not None:
+        while parent is not None:
             if node.marked is False:
                 node.marked = True
-            else:
-                self.cutnode(node, parent)
-                self.cascadecut(parent)
-        
+                return
+            self.cutnode(node, parent)
+            node = parent
+            parent = node.parent
+
     def __str__(self):
-        s = "elements: %d min: (%s,%s)" % (self.elements, str(self.minroot.key), str(self.minroot.value))        
+        if self.minroot is None:
+            return "elements: 0\n"
+        s = "elements: %d min: (%s,%s)" % (self.elements, str(self.minroot.key), str(self.minroot.value))
         s += "\n"
-        s += "".join(str(root) for root in self.rootnodes if root is not None)
+        s += "".join(str(root) for root in self.rootnodes)
         return s
-        
+
 
 def test():
     """ Test Fibonacci heap """
     heap = FibonacciHeap()
     heap.insert(10,1)
     heap.insert(9,2)
-    heap.insert(2,3)    
-    heap.insert(12,4)    
-    node = heap.insert(17,5)    
-    heap.insert(4,6)    
+    heap.insert(2,3)
+    heap.insert(12,4)
+    node = heap.insert(17,5)
+    heap.insert(4,6)
     heap.insert(15,7)
     heap.insert(22,8)
     print(heap)
-    heap.extractmin2()
+    assert heap.extractmin().key == 2
     print(heap)
     heap.insert(8,9)
     heap.insert(11,10)
     heap.insert(1,11)
     print(heap)
-    heap.extractmin2()
+    assert heap.extractmin().key == 1
     print(heap)
-    heap.decreasekey(node, 3)    
+    heap.decreasekey(node, 3)
     print(heap)
-    
-        
+    keys = []
+    while heap.findmin() is not None:
+        keys.append(heap.extractmin().key)
+    assert keys == [3, 4, 8, 9, 10, 11, 12, 15, 22]
+    assert len(heap) == 0
+
+
 if __name__ == '__main__':
     test()
-        
\ No newline at end of file
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+
+# Loader for the .edgelist files written by testgen.write_edgelist:
+#
+#   # Numero de nodos: <n>
+#   # Numero de arcos: <m>
+#   # Densidad: <d>
+#   u v w
+#   ...
+#
+# The edges are parsed in bulk with NumPy and saved to a sidecar binary cache
+# (<file>.cache.npy, a memory-mappable structured array, plus <file>.cache.json
+# with the header and the source file stamp). Later loads map the cache instead
+# of parsing the text again, until the source file's mtime or size changes.
+
+# version of the cache; caches of another version are parsed again
+CACHE_FORMAT = 2
+
+EDGE_DTYPE = np.dtype([('u', np.int64), ('v', np.int64), ('weight', np.float64)])
+
+HEADER_KEYS = {"Numero de nodos": "nodes",
+               "Numero de arcos": "edges",
+               "Densidad": "density"}
+
+
+class EdgeList:
+    """ Edges of a graph file: arrays u, v and weight plus the file header
+    (nodes, edges and density, if present). """
+    def __init__(self, path, edges, header):
+        self.path = path
+        self.edges = edges
+        self.u = edges['u']
+        self.v = edges['v']
+        self.weight = edges['weight']
+        self.header = header
+
+    def __len__(self):
+        return len(self.edges)
+
+    def to_networkx(self):
+        """ Builds a networkx graph; same result as nx.read_weighted_edgelist
+        with nodetype=int. """
+        import networkx as nx
+        graph = nx.Graph()
+        graph.add_weighted_edges_from(zip(self.u.tolist(), self.v.tolist(), self.weight.tolist()))
+        return graph
+
+    def to_csr(self):
+        """ Builds a CSRGraph. """
+        from csr_graph import CSRGraph
+        return CSRGraph.from_arrays(self.u, self.v, self.weight)
+
+
+def parse_header(lines):
+    """ Reads the node count, edge count and density from the '#' lines. """
+    header = {}
+    for line in lines:
+        key, _, value = line.lstrip("#").partition(":")
+        key = HEADER_KEYS.get(key.strip())
+        if key is not None:
+            header[key] = float(value) if key == "density" else int(value)
+    return header
+
+
+def parse_edgelist(path):
+    """ Parses an .edgelist file. Returns the edges as an EDGE_DTYPE array and
+    the header dictionary. """
+    with open(path, "rb") as fp:
+        data = fp.read()
+
+    # header lines are at the top of the file
+    comments = []
+    start = 0
+    while data.startswith(b"#", start):
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = len(data)
+        comments.append(data[start:end].decode())
+        start = end + 1
+
+    return parse_edges(data[start:], path), parse_header(comments)
+
+
+def parse_edges(data, path=""):
+    """ Parses the 'u v w' lines in data (bytes) into an EDGE_DTYPE array. As
+    with nx.read_weighted_edgelist, '#' starts a comment and blank lines are
+    skipped. Raises ValueError if a line is not two integer nodes and a
+    weight. """
+    if b"#" in data:
+        data = b"\n".join(line.partition(b"#")[0] for line in data.split(b"\n"))
+
+    # fromstring stops quietly at the first token it cannot parse, so the
+    # values are checked against the tokens of each line
+    tokens = line_tokens(data)
+    values = np.fromstring(data, dtype=np.float64, sep=" ") if tokens.any() else np.zeros(0)
+    if ((tokens != 0) & (tokens != 3)).any() or len(values) != tokens.sum():
+        raise ValueError("{0}: malformed edge list{1}".format(path, malformed_line(data)))
+    values = values.reshape(-1, 3)
+    if not (values[:, :2] == np.floor(values[:, :2])).all():
+        raise ValueError("{0}: malformed edge list (non integer node)".format(path))
+
+    edges = np.empty(len(values), dtype=EDGE_DTYPE)
+    edges['u'] = values[:, 0]
+    edges['v'] = values[:, 1]
+    edges['weight'] = values[:, 2]
+    return edges
+
+
+def line_tokens(data):
+    """ Number of whitespace separated tokens in each line of data (bytes). """
+    b = np.frombuffer(data, dtype=np.uint8)
+    content = b > 32
+    start = content.copy() # first byte of each token
+    start[1:] &= ~content[:-1]
+    newline = b == 10
+    # newlines and token starts, in order; the tokens of a line are the
+    # entries between two newlines
+    newline = newline[start | newline]
+    ends = np.append(np.flatnonzero(newline), len(newline))
+    return np.diff(ends, prepend=-1) - 1
+
+
+def malformed_line(data):
+    """ The first line of data that is not 'u v w', for the error message
+    (data may be a chunk of the file, so there is no line number). """
+    for line in data.split(b"\n"):
+        fields = line.split()
+        if not fields:
+            continue
+        try:
+            if len(fields) == 3 and [float(f) for f in fields]:
+                continue
+        except ValueError:
+            pass
+        return " (bad line: {0!r})".format(line.decode(errors="replace").strip())
+    return ""
+
+
+def file_checksum(path):
+    """ Returns the sha1 (hex) of the contents of a file. """
+    checksum = hashlib.sha1()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(2**20), b""):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def cache_paths(path):
+    """ Returns the paths of the binary cache and its metadata. """
+    return path + ".cache.npy", path + ".cache.json"
+
+
+def file_stamp(path):
+    """ Returns the (mtime, size) pair used to validate the cache. """
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_cache(path):
+    """ Maps the cache of path, or returns None if it is missing or stale. """
+    npy_path, meta_path = cache_paths(path)
+    try:
+        with open(meta_path) as fp:
+            meta = json.load(fp)
+        if meta["stamp"] != file_stamp(path) or meta.get("format") != CACHE_FORMAT:
+            return None
+        edges = np.load(npy_path, mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+    return EdgeList(path, edges, meta["header"])
+
+
+def replace_file(path, write, mode="w"):
+    """ Writes path atomically: write(fp) writes a temporary file of this
+    process (pid suffix) in the same directory, which then replaces path.
+    Several processes can write the same path at once; the last one wins. """
+    tmp = "{0}.{1}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp, mode) as fp:
+            write(fp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def save_cache(edgelist):
+    """ Writes the cache of an edge list. Errors (e.g. read-only directories)
+    are ignored: the cache is only an optimization. """
+    npy_path, meta_path = cache_paths(edgelist.path)
+    try:
+        replace_file(npy_path, lambda fp: np.save(fp, edgelist.edges), "wb")
+        meta = {"stamp": file_stamp(edgelist.path), "header": edgelist.header, "format": CACHE_FORMAT}
+        replace_file(meta_path, lambda fp: json.dump(meta, fp))
+    except OSError:
+        pass
+
+
+def load_edgelist(path, cache=True):
+    """ Loads an .edgelist file, from its binary cache when it is up to date.
+    """
+    if cache:
+        edgelist = load_cache(path)
+        if edgelist is not None:
+            return edgelist
+
+    edges, header = parse_edgelist(path)
+    edgelist = EdgeList(path, edges, header)
+    if cache:
+        save_cache(edgelist)
+    return edgelist
+
+
+# Manifest of a corpus of graphs (written by testgen): one row per file with
+# its nodes, edges, density, seed and checksum, so the tests can find the
+# graphs without scanning the directory and reading the headers.
+MANIFEST = "manifest.tsv"
+MANIFEST_COLUMNS = ["File", "Nodes", "Edges", "Density", "Seed", "Checksum"]
+
+
+def read_manifest(directory):
+    """ Returns the rows (dictionaries) of the manifest in directory, or None
+    if there is no manifest. """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as fp:
+        columns = fp.readline().rstrip("\n").split("\t")
+        rows = [dict(zip(columns, line.rstrip("\n").split("\t"))) for line in fp if line.strip()]
+    for row in rows:
+        row["Nodes"] = int(row["Nodes"])
+        row["Edges"] = int(row["Edges"])
+        row["Density"] = float(row["Density"])
+    return rows
+
+
+def update_manifest(directory, rows):
+    """ Adds rows to the manifest in directory; a row replaces the previous
+    one of the same file. """
+    merged = OrderedDict((row["File"], row) for row in read_manifest(directory) or [])
+    for row in rows:
+        merged[row["File"]] = row
+    def write(fp):
+        fp.write("\t".join(MANIFEST_COLUMNS) + "\n")
+        for row in merged.values():
+            fp.write("\t".join(str(row[c]) for c in MANIFEST_COLUMNS) + "\n")
+    replace_file(os.path.join(directory, MANIFEST), write)
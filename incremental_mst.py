@@ -0,0 +1,280 @@
+# Incremental maintenance of a minimum spanning tree (forest) under edge
+# insertions and weight decreases. A new edge (u, v, w) enters the tree if u
+# and v are in different trees, or if the heaviest edge on the tree path from u
+# to v is heavier than w; that edge is then removed (cycle property). The path
+# maximum is found with a link-cut tree (Sleator and Tarjan), so each update
+# costs O(log n) amortized instead of a full recomputation.
+#
+# In the link-cut tree each tree edge is a node of its own, between the nodes
+# of its endpoints, and only the edge nodes have a weight.
+
+from mst_result import MSTBuilder
+
+NO_WEIGHT = float("-inf")
+
+
+class LinkCutNode:
+    """ A node of the link-cut tree: a graph node or a tree edge. """
+    __slots__ = ("left", "right", "parent", "rev", "weight", "max", "key")
+
+    def __init__(self, key, weight=NO_WEIGHT):
+        self.left = None
+        self.right = None
+        self.parent = None  # splay parent, or path parent if the node is a root
+        self.rev = False    # the children must be swapped
+        self.weight = weight
+        self.max = self     # node of max weight in the splay subtree
+        self.key = key      # node label, or (u, v) for an edge node
+
+    def is_root(self):
+        """ True if the node is the root of its splay tree. """
+        p = self.parent
+        return p is None or (p.left is not self and p.right is not self)
+
+
+def push(x):
+    """ Propagates the pending reversal of x to its children. """
+    if x.rev:
+        x.left, x.right = x.right, x.left
+        if x.left is not None:
+            x.left.rev = not x.left.rev
+        if x.right is not None:
+            x.right.rev = not x.right.rev
+        x.rev = False
+
+
+def update(x):
+    """ Recomputes the max of x from its children. """
+    x.max = x
+    if x.left is not None and x.left.max.weight > x.max.weight:
+        x.max = x.left.max
+    if x.right is not None and x.right.max.weight > x.max.weight:
+        x.max = x.right.max
+
+
+def rotate(x):
+    """ Rotates x over its parent. """
+    p = x.parent
+    g = p.parent
+    if not p.is_root():
+        if g.left is p:
+            g.left = x
+        else:
+            g.right = x
+    x.parent = g
+    if p.left is x:
+        p.left = x.right
+        if x.right is not None:
+            x.right.parent = p
+        x.right = p
+    else:
+        p.right = x.left
+        if x.left is not None:
+            x.left.parent = p
+        x.left = p
+    p.parent = x
+    update(p)
+    update(x)
+
+
+def splay(x):
+    """ Moves x to the root of its splay tree. """
+    # push the pending reversals from the root down to x
+    path = [x]
+    while not path[-1].is_root():
+        path.append(path[-1].parent)
+    for node in reversed(path):
+        push(node)
+
+    while not x.is_root():
+        p = x.parent
+        if not p.is_root():
+            g = p.parent
+            if (g.left is p) == (p.left is x):
+                rotate(p)
+            else:
+                rotate(x)
+        rotate(x)
+
+
+def access(x):
+    """ Makes the path from the root of the tree to x the preferred path. """
+    last = None
+    y = x
+    while y is not None:
+        splay(y)
+        y.right = last
+        update(y)
+        last = y
+        y = y.parent
+    splay(x)
+
+
+def make_root(x):
+    """ Makes x the root of its tree. """
+    access(x)
+    x.rev = not x.rev
+
+
+def find_root(x):
+    """ Returns the root of the tree of x. """
+    access(x)
+    push(x)
+    while x.left is not None:
+        x = x.left
+        push(x)
+    splay(x)
+    return x
+
+
+def link(x, y):
+    """ Adds the edge x - y; x and y must be in different trees. """
+    make_root(x)
+    x.parent = y
+
+
+def cut(x, y):
+    """ Removes the edge x - y. """
+    make_root(x)
+    access(y)
+    # x is now the left child of y, with no right child
+    y.left = None
+    x.parent = None
+    update(y)
+
+
+def path_max(x, y):
+    """ Returns the node of max weight on the path x - y. """
+    make_root(x)
+    access(y)
+    return y.max
+
+
+class IncrementalMST:
+    """ Minimum spanning forest that accepts edge insertions and weight
+    decreases. It is seeded from an MST result (an MSTResult, or any iterable
+    of (u, v, {'weight': w}) edges). """
+
+    def __init__(self, mst=()):
+        self.nodes = {}   # label -> LinkCutNode
+        self.edges = {}   # (u, v) -> edge LinkCutNode
+        self.weight = 0   # total weight
+        for u, v, data in mst:
+            self.insert(u, v, data['weight'])
+
+    def __len__(self):
+        return len(self.edges)
+
+    def node(self, u):
+        """ Returns the link-cut node of label u, adding it if needed. """
+        if u not in self.nodes:
+            self.nodes[u] = LinkCutNode(u)
+        return self.nodes[u]
+
+    def key(self, u, v):
+        """ Key of the edge u - v in self.edges. """
+        if (v, u) in self.edges:
+            return (v, u)
+        return (u, v)
+
+    def connected(self, u, v):
+        """ True if u and v are in the same tree. """
+        if u not in self.nodes or v not in self.nodes:
+            return u == v
+        return find_root(self.nodes[u]) is find_root(self.nodes[v])
+
+    def insert(self, u, v, w):
+        """ Adds the edge u - v to the forest (u and v must be in different
+        trees). """
+        edge = LinkCutNode((u, v), w)
+        link(self.node(u), edge)
+        link(edge, self.node(v))
+        self.edges[u, v] = edge
+        self.weight += w
+
+    def remove(self, key):
+        """ Removes the edge with the given key from the forest. """
+        edge = self.edges.pop(key)
+        u, v = key
+        cut(self.nodes[u], edge)
+        cut(edge, self.nodes[v])
+        self.weight -= edge.weight
+
+    def add_edge(self, u, v, w):
+        """ Adds the edge u - v of weight w to the graph. Returns True if the
+        tree changed. """
+        if u == v:
+            return False
+        key = self.key(u, v)
+        if key in self.edges:
+            if w > self.edges[key].weight:
+                raise ValueError("weight increases of tree edges are not supported")
+            return self.decrease_weight(u, v, w)
+        if not self.connected(u, v):
+            self.insert(u, v, w)
+            return True
+
+        heaviest = path_max(self.nodes[u], self.nodes[v])
+        if heaviest.weight <= w:
+            return False
+        self.remove(heaviest.key)
+        self.insert(u, v, w)
+        return True
+
+    def decrease_weight(self, u, v, w):
+        """ Decreases the weight of the edge u - v to w. Returns True if the
+        tree changed. """
+        key = self.key(u, v)
+        if key not in self.edges:
+            # a non tree edge may replace a heavier one
+            return self.add_edge(u, v, w)
+        edge = self.edges[key]
+        if w > edge.weight:
+            raise ValueError("the new weight must not be larger")
+        access(edge)
+        self.weight += w - edge.weight
+        edge.weight = w
+        update(edge)
+        return True
+
+    def mst(self):
+        """ Returns the forest as an MSTResult. """
+        mst = MSTBuilder()
+        for (u, v), edge in self.edges.items():
+            mst.append(u, v, edge.weight)
+        return mst.result()
+
+
+def test():
+    """ Checks the updates against a full recomputation with Kruskal """
+    import random
+    import networkx as nx
+    import aycc
+    rnd = random.Random(1)
+    n = 60
+    graph = nx.Graph()
+    graph.add_nodes_from(range(n))
+    for _ in range(150):
+        u, v = rnd.sample(range(n), 2)
+        graph.add_edge(u, v, weight=rnd.randint(1, 100))
+    inc = IncrementalMST(aycc.kruskal(graph, sort=True))
+
+    for step in range(500):
+        u, v = rnd.sample(range(n), 2)
+        if graph.has_edge(u, v):
+            w = rnd.randint(0, graph[u][v]['weight'])
+            graph[u][v]['weight'] = w
+            inc.decrease_weight(u, v, w)
+        else:
+            w = rnd.randint(1, 100)
+            graph.add_edge(u, v, weight=w)
+            inc.add_edge(u, v, w)
+        full = aycc.kruskal(graph, sort=True)
+        assert inc.weight == full.total_weight
+        assert inc.mst().total_weight == full.total_weight
+        assert len(inc) == len(full)
+    print("ok")
+
+
+if __name__ == '__main__':
+    test()
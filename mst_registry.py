@@ -0,0 +1,135 @@
+import time
+from collections import OrderedDict
+
+# Registry of the MST implementations compared by the tests. Each algorithm
+# declares its name (the Algorithm column of the results), the label used in
+# the reports, the function, an optional heap factory and the input
+# representation it runs on. The heap is built before the timed call; with
+# heap_input the factory is given the input of the function (e.g. to size the
+# heap from the edge weights). Such a factory raises ValueError if the
+# algorithm cannot run on that input (e.g. a bucket queue with non integer
+# weights); check() returns the reason, and the tests skip those runs. The
+# algorithms are registered by aycc.
+#
+# The version of an algorithm identifies its implementation in the result
+# store (result_store): bump it when the implementation changes, so the stored
+# results of the old one are not reused.
+
+class MSTAlgorithm:
+    """ A registered MST implementation. """
+    def __init__(self, name, label, func, heap=None, representation="nx", kwargs=None, version=1, heap_input=False):
+        self.name = name
+        self.label = label
+        self.func = func
+        self.heap = heap                      # heap factory, or None
+        self.heap_input = heap_input          # heap factory takes the input
+        self.representation = representation  # key of REPRESENTATIONS
+        self.kwargs = kwargs or {}
+        self.version = version                # implementation version
+
+    def args(self, inputs):
+        """ Returns the positional arguments of func. inputs caches the
+        representations of the graph already built. """
+        if self.representation not in inputs:
+            graph = inputs["nx"][0]
+            start = time.perf_counter()
+            inputs[self.representation] = REPRESENTATIONS[self.representation](graph)
+            inputs["setup", self.representation] = time.perf_counter() - start
+        args = inputs[self.representation]
+        if self.heap is not None:
+            args = args + (self.heap(*args) if self.heap_input else self.heap(),)
+        return args
+
+    def check(self, inputs):
+        """ Returns None if the algorithm can run on inputs, or the reason why
+        it cannot (the ValueError of its heap factory). Also builds the input
+        representation. """
+        try:
+            self.args(inputs)
+        except ValueError as e:
+            return str(e)
+        return None
+
+    def setup_time(self, inputs):
+        """ Time (secs) spent building the input representation. """
+        return inputs.get(("setup", self.representation), 0.0)
+
+    def __call__(self, *args):
+        return self.func(*args, **self.kwargs)
+
+
+def sorted_edges(graph):
+    """ Input of Kruskal with the edges sorted beforehand. """
+    edges = sorted(graph.edges(data=True), key=lambda edge: edge[2]['weight'])
+    return (graph, edges)
+
+
+def csr(graph):
+    """ Input of the methods that run on a CSRGraph. """
+    from csr_graph import CSRGraph
+    return (CSRGraph.from_networkx(graph),)
+
+
+def csr_shared(graph):
+    """ Input of the methods that run on a CSRGraph with its edges in shared
+    memory and a process pool (boruvka.SharedEdges). """
+    import boruvka
+    graph_csr = csr(graph)[0]
+    return (graph_csr, boruvka.SharedEdges(graph_csr))
+
+
+# Builders of the input representations, from the networkx graph. The result
+# is the tuple of positional arguments passed to the algorithm.
+REPRESENTATIONS = {"nx": lambda graph: (graph,),
+                   "sorted_edges": sorted_edges,
+                   "csr": csr,
+                   "csr_shared": csr_shared}
+
+# Representations that start processes; they cannot be built inside a test
+# worker process
+PROCESS_REPRESENTATIONS = ["csr_shared"]
+
+REGISTRY = OrderedDict()
+
+
+def register(name, label, func, heap=None, representation="nx", version=1, heap_input=False, **kwargs):
+    """ Registers an MST implementation. """
+    if representation not in REPRESENTATIONS:
+        raise ValueError("Unknown representation: {0}".format(representation))
+    REGISTRY[name] = MSTAlgorithm(name, label, func, heap, representation, kwargs, version, heap_input)
+    return REGISTRY[name]
+
+
+def load():
+    """ Makes sure the algorithms are registered. """
+    if not REGISTRY:
+        import aycc
+
+
+def get(name):
+    """ Returns the registered algorithm called name. """
+    load()
+    return REGISTRY[name]
+
+
+def names():
+    """ Names of the registered algorithms, in registration order. """
+    load()
+    return list(REGISTRY.keys())
+
+
+def labels():
+    """ Dictionary of algorithm name -> report label. """
+    load()
+    return OrderedDict((name, alg.label) for name, alg in REGISTRY.items())
+
+
+def select(include=None, exclude=None):
+    """ Names of the registered algorithms in include (all by default) and not
+    in exclude. Raises KeyError on unknown names. """
+    load()
+    for name in (include or []) + (exclude or []):
+        if name not in REGISTRY:
+            raise KeyError(name)
+    selected = include or list(REGISTRY.keys())
+    return [name for name in REGISTRY if name in selected and name not in (exclude or [])]
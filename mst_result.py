@@ -0,0 +1,151 @@
+import hashlib
+import math
+import numpy as np
+
+# Result of the MST methods. The edges of the tree are kept in three arrays
+# (src, dst and weight) instead of a list of (u, v, {'weight': w}) tuples, so a
+# big tree costs three arrays and no per-edge objects. The total weight, the
+# number of edges and a hash of the canonical (sorted) edge set are computed
+# once. The tuple form is still available, built on demand, for the callers
+# that iterate over the edges.
+
+class MSTResult:
+    """ Edges of a minimum spanning tree (or forest). src and dst hold node
+    labels. """
+    def __init__(self, src, dst, weight):
+        self.src = np.asarray(src)
+        self.dst = np.asarray(dst)
+        self.weight = np.asarray(weight)
+        self._total = None
+        self._digest = None
+
+    @classmethod
+    def from_tuples(cls, edges):
+        """ Builds the result from (u, v, {'weight': w}) tuples. """
+        builder = MSTBuilder()
+        for u, v, data in edges:
+            builder.append(u, v, data['weight'])
+        return builder.result()
+
+    @classmethod
+    def from_ids(cls, csr, edges):
+        """ Builds the result from edge ids of a CSRGraph. """
+        edges = np.asarray(edges, dtype=np.int64)
+        return cls.from_nodes(csr.labels, csr.src[edges], csr.dst[edges], csr.weight[edges])
+
+    @classmethod
+    def from_nodes(cls, labels, src, dst, weight):
+        """ Builds the result from node ids src and dst, where labels[i] is the
+        label of the node with id i. """
+        labels = np.asarray(labels)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        return cls(labels[src], labels[dst], weight)
+
+    def __len__(self):
+        return len(self.weight)
+
+    @property
+    def total_weight(self):
+        """ Sum of the edge weights. Floats are summed exactly (math.fsum), so
+        the total does not depend on the order of the edges. """
+        if self._total is None:
+            if self.weight.dtype.kind in "iub":
+                self._total = int(self.weight.sum())
+            else:
+                self._total = math.fsum(self.weight.tolist())
+        return self._total
+
+    def canonical(self):
+        """ Returns the (u, v, w) edges with u <= v, sorted. """
+        src, dst, weight = self.src, self.dst, self.weight
+        if src.dtype.kind in "iuf" and dst.dtype.kind in "iuf":
+            lo = np.minimum(src, dst)
+            hi = np.maximum(src, dst)
+            order = np.lexsort((weight, hi, lo))
+            return lo[order], hi[order], weight[order]
+        edges = sorted((min(u, v), max(u, v), w)
+                       for u, v, w in zip(src.tolist(), dst.tolist(), weight.tolist()))
+        return ([e[0] for e in edges], [e[1] for e in edges], [e[2] for e in edges])
+
+    @property
+    def digest(self):
+        """ Hash (hex) of the canonical edge set: two results with the same
+        edges have the same digest, whatever the order of the edges. """
+        if self._digest is None:
+            lo, hi, weight = self.canonical()
+            h = hashlib.sha1()
+            if isinstance(lo, np.ndarray):
+                h.update(lo.astype(np.int64).tobytes())
+                h.update(hi.astype(np.int64).tobytes())
+                h.update(np.asarray(weight, dtype=np.float64).tobytes())
+            else:
+                h.update(repr((lo, hi, weight)).encode())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def __eq__(self, other):
+        if not isinstance(other, MSTResult):
+            return NotImplemented
+        return len(self) == len(other) and self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __iter__(self):
+        for u, v, w in zip(self.src.tolist(), self.dst.tolist(), self.weight.tolist()):
+            yield (u, v, {'weight': w})
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return (self.src[i].item(), self.dst[i].item(), {'weight': self.weight[i].item()})
+
+    def tolist(self):
+        """ Returns the edges as a list of (u, v, {'weight': w}) tuples. """
+        return list(self)
+
+    def __repr__(self):
+        return "MSTResult(edges={0}, weight={1})".format(len(self), self.total_weight)
+
+
+class MSTBuilder:
+    """ Collects the edges of a tree as they are found, without a tuple and a
+    dict per edge. """
+    def __init__(self):
+        self.src = []
+        self.dst = []
+        self.weight = []
+
+    def append(self, u, v, w):
+        self.src.append(u)
+        self.dst.append(v)
+        self.weight.append(w)
+
+    def __len__(self):
+        return len(self.weight)
+
+    def result(self, labels=None):
+        """ Returns the MSTResult of the edges collected. If labels is given,
+        the endpoints are node ids and labels[i] is the label of node i. """
+        if labels is not None:
+            return MSTResult.from_nodes(labels, self.src, self.dst, self.weight)
+        return MSTResult(self.src, self.dst, self.weight)
+
+
+def test():
+    """ Checks the totals, the lazy tuples and the canonical hash """
+    a = MSTResult([1, 2, 3], [2, 3, 4], [0.1, 0.2, 0.3])
+    b = MSTResult.from_tuples([(4, 3, {'weight': 0.3}), (2, 1, {'weight': 0.1}), (3, 2, {'weight': 0.2})])
+    assert len(a) == 3 and a.total_weight == b.total_weight == math.fsum([0.1, 0.2, 0.3])
+    assert a == b and a.digest == b.digest
+    assert a != MSTResult([1, 2, 3], [2, 3, 5], [0.1, 0.2, 0.3])
+    assert a[0] == (1, 2, {'weight': 0.1}) and a.tolist()[2] == (3, 4, {'weight': 0.3})
+    assert sum(e[2]['weight'] for e in a) == sum([0.1, 0.2, 0.3])
+    empty = MSTBuilder().result()
+    assert len(empty) == 0 and empty.total_weight == 0 and empty.tolist() == []
+    print("ok")
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,170 @@
+# Pairing heap (Fredman, Sedgewick, Sleator and Tarjan, 1986), with the
+# insert/extractmin/decreasekey interface of fib_heap.FibonacciHeap.
+#
+# The heap is a single tree. The children of a node are a doubly-linked list:
+# child is the leftmost child, and prev is the left sibling, or the parent for
+# the leftmost child. insert and decreasekey link a one-node tree (or the cut
+# subtree) with the root in O(1); extractmin merges the children of the root
+# in two passes: pairs from left to right, and then the pairs from right to
+# left into a single tree.
+
+class HeapNode():
+    """ Represents a node in the heap """
+    __slots__ = ("key", "value", "child", "next", "prev")
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.child = None # leftmost child
+        self.next = None  # right sibling
+        self.prev = None  # left sibling, or parent of the leftmost child
+
+    def children(self):
+        """ Returns the list of children of the node. """
+        children = []
+        node = self.child
+        while node is not None:
+            children.append(node)
+            node = node.next
+        return children
+
+    def str(self, indent = 0):
+        """ String representation of the node. """
+        return (" " * indent + "key: %s value: %s" % (self.key, self.value) +
+                "\n" + "".join(child.str(indent + 2) for child in self.children()))
+
+    def __str__(self):
+        return self.str()
+
+
+def link(a, b):
+    """ Links the roots a and b; the one with the larger key becomes the
+    leftmost child of the other. Returns the new root. """
+    if b.key < a.key:
+        a, b = b, a
+    b.prev = a
+    b.next = a.child
+    if a.child is not None:
+        a.child.prev = b
+    a.child = b
+    return a
+
+
+class PairingHeap():
+    """ Implements a Pairing Heap data structure: a tree satisfying the
+    minimum-heap property, that is, the key of a child is always greater than
+    or equal to the key of the parent. """
+
+    def __init__(self, key=None, value=None):
+        """ Creates a new Pairing Heap. """
+        self.root = None
+        self.elements = 0
+
+        if key is not None and value is not None:
+            self.insert(key, value)
+
+    def __len__(self):
+        return self.elements
+
+    def findmin(self):
+        """ Return the pointer to the node containing the minimum key value. """
+        return self.root
+
+    def insert(self, key, value):
+        """ Links a new one-node tree with the root. """
+        node = HeapNode(key, value)
+        self.root = node if self.root is None else link(self.root, node)
+        self.elements += 1
+        return node
+
+    def merge(self, otherheap):
+        """ Links the roots of the two heaps. """
+        if otherheap.root is None:
+            return
+        self.root = otherheap.root if self.root is None else link(self.root, otherheap.root)
+        self.elements += otherheap.elements
+        otherheap.root = None
+        otherheap.elements = 0
+
+    def extractmin(self):
+        """ Removes the root and merges its children in two passes. """
+        root = self.root
+        if root is None:
+            return None
+
+        # first pass: link the children in pairs, from left to right
+        pairs = []
+        node = root.child
+        while node is not None:
+            a = node
+            b = a.next
+            if b is None:
+                node = None
+            else:
+                node = b.next
+                b.next = b.prev = None
+            a.next = a.prev = None
+            pairs.append(a if b is None else link(a, b))
+
+        # second pass: merge the pairs from right to left
+        tree = pairs.pop() if pairs else None
+        while pairs:
+            tree = link(pairs.pop(), tree)
+
+        self.root = tree
+        root.child = None
+        self.elements -= 1
+        return root
+
+    def decreasekey(self, node, newkey):
+        """ Change the node key to newkey. The subtree of node is cut and
+        linked with the root. """
+        node.key = newkey
+        if node is self.root:
+            return
+        # cut the subtree of node
+        if node.prev.child is node:
+            node.prev.child = node.next # leftmost child
+        else:
+            node.prev.next = node.next
+        if node.next is not None:
+            node.next.prev = node.prev
+        node.next = node.prev = None
+        self.root = link(self.root, node)
+
+    def __str__(self):
+        if self.root is None:
+            return "elements: 0\n"
+        s = "elements: %d min: (%s,%s)" % (self.elements, str(self.root.key), str(self.root.value))
+        return s + "\n" + str(self.root)
+
+
+def test():
+    """ Test Pairing heap """
+    heap = PairingHeap()
+    heap.insert(10,1)
+    heap.insert(9,2)
+    heap.insert(2,3)
+    heap.insert(12,4)
+    node = heap.insert(17,5)
+    heap.insert(4,6)
+    heap.insert(15,7)
+    heap.insert(22,8)
+    print(heap)
+    assert heap.extractmin().key == 2
+    print(heap)
+    heap.insert(8,9)
+    heap.insert(11,10)
+    heap.insert(1,11)
+    assert heap.extractmin().key == 1
+    heap.decreasekey(node, 3)
+    print(heap)
+    keys = []
+    while heap.findmin() is not None:
+        keys.append(heap.extractmin().key)
+    assert keys == [3, 4, 8, 9, 10, 11, 12, 15, 22]
+    assert len(heap) == 0
+
+
+if __name__ == '__main__':
+    test()
@@ -1,31 +1,168 @@
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Labels
-labels_text = {"kruskal_sorted1":"Kruskal (KS1)",
-               "kruskal_sorted2":"Kruskal (KS2)",
-               "prim":"PrimArr", 
-               "prim_2h":"Prim2H (A)", #Prim 2-Heap
-               "prim_3h":"Prim3H (A)", #Prim 3-Heap
-               "prim_binomial":"PrimBi (A)", # Binomial
-               "prim_fibonacci":"PrimFib (A)", # Fibonacci                   
-               "prim_binomial_nx":"PrimBi",
-               "prim_2h_nx":"Prim2H",
-               "prim_3h_nx":"Prim3H",
-               "prim_fibonacci_nx":"PrimFib"}
-               
-all_methods = list(labels_text.keys())
-prim_methods = [m for m in all_methods if m.startswith("prim")]
-prim_methods_nx = [m for m in all_methods if m.endswith("_nx")]
-kruskal_methods = [m for m in all_methods if m.startswith("kruskal")]
-
-def graph(df, title, save_file, methods=[], colors=[], variant="Density", log=False):
+import mst_registry
+
+try:
+    import pyarrow # Parquet support of pandas
+except ImportError:
+    pyarrow = None
+
+# The results of a test (test-result.txt, written by aycc) are also saved as a
+# typed columnar table next to it (Parquet, or a pickle without pyarrow), with
+# the file and algorithm columns as categoricals. The plots work on a summary
+# of the results: count, sum, sum of squares, min and max of the times for
+# each (size, edges, density, algorithm), and the max of the memory measures (aycc
+# --memory), computed in one grouped pass. The summary
+# of all the result files under a directory is kept in results-summary, one
+# partial summary per file, and only new or changed files are read again.
+
+CATEGORICAL = {"File": "category", "Algorithm": "category"}
+SUMMARY_KEYS = ["Size", "Edges", "Density", "Algorithm"]
+SUMMARY_FILE = "results-summary"
+MEMORY_COLUMNS = ["PeakMemory", "RSSDelta"] # bytes
+
+# Labels, from the registry of MST methods
+def labels_text():
+    """ Dictionary of method name -> label. """
+    return mst_registry.labels()
+
+def all_methods():
+    return mst_registry.names()
+
+def prim_methods():
+    return [m for m in all_methods() if m.startswith("prim")]
+
+def prim_methods_nx():
+    return [m for m in all_methods() if m.endswith("_nx")]
+
+def kruskal_methods():
+    return [m for m in all_methods() if m.startswith("kruskal")]
+
+def table_path(base):
+    """ Path of the columnar table base. """
+    return base + (".parquet" if pyarrow is not None else ".pkl")
+
+def write_table(df, base):
+    """ Writes the table df to base.parquet (base.pkl without pyarrow). """
+    if pyarrow is not None:
+        df.to_parquet(table_path(base), index=False)
+    else:
+        df.to_pickle(table_path(base))
+
+def read_table(base):
+    """ Reads the table written by write_table, or returns None. """
+    path = table_path(base)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path) if pyarrow is not None else pd.read_pickle(path)
+
+def read_results(file):
+    """ Reads a test-result file, from its columnar copy if it is up to
+    date. """
+    base = os.path.splitext(file)[0]
+    path = table_path(base)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(file):
+        return read_table(base)
+    return pd.read_csv(file, sep='\t', dtype=CATEGORICAL)
+
+def save_results(file):
+    """ Saves the columnar copy of a test-result file. """
+    write_table(pd.read_csv(file, sep='\t', dtype=CATEGORICAL), os.path.splitext(file)[0])
+
+def nominal_size(files):
+    """ Nominal number of edges of each graph file, from its name (e.g. 100
+    for graph_100_0.1.edgelist), or "" if the name has none. """
+    return files.astype(str).str.extract(r"^[A-Za-z]+_(\d+)_", expand=False).fillna("")
+
+def summarize(df):
+    """ Count, sum, sum of squares, min and max of the times of each
+    (size, edges, density, algorithm) of the results df, and the max of the
+    memory measures (nan for results without them). """
+    df = df.assign(Square=df["Time"] ** 2, Size=nominal_size(df["File"]))
+    for column in MEMORY_COLUMNS:
+        if column not in df.columns:
+            df[column] = float("nan")
+    return df.groupby(SUMMARY_KEYS, observed=True).agg(
+        Count=("Time", "count"), Sum=("Time", "sum"), SumSq=("Square", "sum"),
+        Min=("Time", "min"), Max=("Time", "max"),
+        **dict((c, (c, "max")) for c in MEMORY_COLUMNS)).reset_index()
+
+def combine(partials):
+    """ Merges partial summaries, and adds the mean and the standard
+    deviation of the times. """
+    summary = partials.groupby(SUMMARY_KEYS, observed=True).agg(
+        Count=("Count", "sum"), Sum=("Sum", "sum"), SumSq=("SumSq", "sum"),
+        Min=("Min", "min"), Max=("Max", "max"),
+        **dict((c, (c, "max")) for c in MEMORY_COLUMNS)).reset_index()
+    summary["Mean"] = summary["Sum"] / summary["Count"]
+    var = (summary["SumSq"] - summary["Sum"] ** 2 / summary["Count"]) / (summary["Count"] - 1)
+    summary["Std"] = var.clip(lower=0) ** 0.5
+    return summary
+
+def file_stamp(path):
+    st = os.stat(path)
+    return "{0}:{1}".format(st.st_mtime_ns, st.st_size)
+
+def update_summary(path):
+    """ Returns the summary of all the test-result files under path. The
+    partial summaries are kept in path/results-summary, and only the files
+    that are new or changed since the last call are read. """
+    partials = read_table(os.path.join(path, SUMMARY_FILE))
+    if partials is not None and not set(MEMORY_COLUMNS + SUMMARY_KEYS) <= set(partials.columns):
+        partials = None # older format, rebuilt
+
+    # test-result files under path and their stamps
+    stamps = {}
+    for dirpath, dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            if filename.startswith("test-result") and filename.endswith(".txt"):
+                file = os.path.join(dirpath, filename)
+                stamps[os.path.relpath(file, path)] = file_stamp(file)
+
+    known = {}
+    if partials is not None:
+        known = dict(zip(partials["Source"].astype(str), partials["Stamp"]))
+        partials = partials[[stamps.get(s) == t for s, t in zip(partials["Source"].astype(str), partials["Stamp"])]]
+    changed = [source for source, stamp in stamps.items() if known.get(source) != stamp]
+
+    parts = [] if partials is None else [partials]
+    for source in changed:
+        part = summarize(read_results(os.path.join(path, source)))
+        parts.append(part.assign(Source=source, Stamp=stamps[source]))
+    if not parts:
+        raise ValueError("No test-result files found in {0}".format(path))
+    partials = pd.concat(parts, ignore_index=True)
+    for column in ["Algorithm", "Source"]:
+        partials[column] = partials[column].astype(str).astype("category")
+
+    if changed or len(known) != len(stamps):
+        write_table(partials, os.path.join(path, SUMMARY_FILE))
+    return combine(partials)
+
+def has_memory(df):
+    """ True if the summary df has memory measures (aycc --memory). """
+    return bool(df["PeakMemory"].notna().any())
+
+def memory_methods():
+    """ One method for each graph representation and heap kind. """
+    return [m for m in ["kruskal_sorted1", "kruskal_csr", "prim", "prim_dense", "prim_2h",
+                        "prim_2h_nx", "prim_4h", "prim_csr", "prim_2h_csr", "prim_lazy",
+                        "boruvka"] if m in all_methods()]
+
+def graph(df, title, save_file, methods=[], colors=[], variant="Density", log=False, measure="Time"):
+    """ Plots the mean time (or the max of a memory measure, in MB) of the
+    methods against variant. df is a summary (see summarize), or the results
+    of a test. """
+    if "Count" not in df.columns:
+        df = summarize(df)
     fig, ax = plt.subplots(figsize=(10,7.5))
     
     plt.xticks(fontsize=12)
     plt.yticks(fontsize=12)
-    plt.xlabel("Density", fontsize=16)
-    plt.ylabel(r'Time (secs)', fontsize=16)
+    plt.xlabel(variant, fontsize=16)
+    plt.ylabel(r'Time (secs)' if measure == "Time" else "{0} (MB)".format(measure), fontsize=16)
     plt.title(title, fontsize=18)
     plt.grid(True)
     
@@ -33,11 +170,15 @@ def graph(df, title, save_file, methods=[], colors=[], variant="Density", log=Fa
         plt.xscale("log")
         plt.yscale("log")
         
-    for rank, v in enumerate(df.groupby(["Algorithm"])):
+    for rank, v in enumerate(df.groupby("Algorithm", observed=True)):
         algorithm, group = v[0], v[1]
         if algorithm in methods:
-            group_agg = group.groupby([variant]).mean()["Time"]        
-            group_agg.plot(ax=ax, kind="line", lw=2.5, ms=7, color=colors[rank], label=labels_text[algorithm])
+            if measure == "Time":
+                agg = group.groupby(variant)[["Count", "Sum"]].sum()
+                group_agg = agg["Sum"] / agg["Count"]
+            else:
+                group_agg = group.groupby(variant)[measure].max() / 2**20
+            group_agg.plot(ax=ax, kind="line", lw=2.5, ms=7, color=colors[rank % len(colors)], label=labels_text()[algorithm])
     
     plt.legend(loc="best")
     plt.savefig(save_file)
@@ -48,24 +189,24 @@ def graph(df, title, save_file, methods=[], colors=[], variant="Density", log=Fa
 def generate_simple_report(file, save_file_path, methods=[]):   
     """ Generate a simple report """    
     import numpy as np
-    data = pd.read_csv(file, sep='\t')
+    data = read_results(file)
     with open(save_file_path, "w") as save_file:        
-        for k, v in data.groupby(["Algorithm"]):
-            save_file.write(labels_text[k])
-            save_file.write(v.groupby(["Density"])["Time"].agg([len, np.mean, np.std, np.max, np.min]))
+        for k, v in data.groupby("Algorithm", observed=True):
+            save_file.write(labels_text()[k] + "\n")
+            save_file.write(v.groupby("Density")["Time"].agg([len, np.mean, np.std, np.max, np.min]).to_string() + "\n")
             
 
 def generate_simple_report_csv(file, save_file_path):
     """ Generate a CSV report. """
-    data = pd.read_csv(file, sep='\t')
-    data1 = data.groupby(["Algorithm","Density"])["Time"].describe().unstack()
+    data = read_results(file)
+    data1 = data.groupby(["Algorithm","Density"], observed=True)["Time"].describe().unstack()
     data1.to_csv(save_file_path)
         
         
 def generate_graphs(file, save_path):
     """ Graph results in file. """
-    data = pd.read_csv(file, sep='\t')
-    generate_graphs2(data, save_path)
+    data = read_results(file)
+    generate_graphs2(summarize(data), save_path)
     
 #    # These are the "Tableau 20" colors as RGB.
 #    tableau20 = [(31, 119, 180), (174, 199, 232), (255, 127, 14), (255, 187, 120),    
@@ -93,7 +234,7 @@ def generate_graphs(file, save_path):
 #    graph(data, "PPK", "{0}/ppk.pdf".format(save_path), ppk, tableau20)
     
     
-def generate_graphs2(data, save_path, filename_prefix=""):
+def generate_graphs2(data, save_path, filename_prefix="", subtitle=""):
     # These are the "Tableau 20" colors as RGB.
     tableau20 = [(31, 119, 180), (174, 199, 232), (255, 127, 14), (255, 187, 120),    
                  (44, 160, 44), (152, 223, 138), (214, 39, 40), (255, 152, 150),    
@@ -107,23 +248,31 @@ def generate_graphs2(data, save_path, filename_prefix=""):
         r, g, b = tableau20[i]    
         tableau20[i] = (r / 255., g / 255., b / 255.)
         
-    graph(data, "Kruskal", "{0}/{1}kruskal.pdf".format(save_path,filename_prefix), kruskal_methods, tableau20)
-    graph(data, "Prim (A)", "{0}/{1}primA.pdf".format(save_path,filename_prefix), prim_methods, tableau20)
-    graph(data, "Prim", "{0}/{1}prim.pdf".format(save_path,filename_prefix), prim_methods_nx, tableau20)
+    def title(name):
+        return "{0} ({1})".format(name, subtitle) if subtitle else name
+
+    graph(data, title("Kruskal"), "{0}/{1}kruskal.pdf".format(save_path,filename_prefix), kruskal_methods(), tableau20)
+    graph(data, title("Prim (A)"), "{0}/{1}primA.pdf".format(save_path,filename_prefix), prim_methods(), tableau20)
+    graph(data, title("Prim"), "{0}/{1}prim.pdf".format(save_path,filename_prefix), prim_methods_nx(), tableau20)
+    # decreasekey against lazy deletion
+    lazy = ["prim_csr", "prim_2h_csr", "prim_lazy", "prim_lazy_array"]
+    graph(data, title("Prim (CSR)"), "{0}/{1}primlazy.pdf".format(save_path,filename_prefix), lazy, tableau20)
     
     # Graph Prim (nx) methods, Prim and Kruskal
     ppk = []
-    ppk.extend(prim_methods_nx)
+    ppk.extend(prim_methods_nx())
     ppk.append("kruskal_sorted1")
     ppk.append("kruskal_sorted2")
     ppk.append("prim")
-    graph(data, "Prim & Kruskal", "{0}/{1}pk.pdf".format(save_path, filename_prefix), ppk, tableau20)    
+    graph(data, title("Prim & Kruskal"), "{0}/{1}pk.pdf".format(save_path, filename_prefix), ppk, tableau20)
+
+    # memory of the runs, against density
+    if has_memory(data):
+        graph(data, title("Peak memory"), "{0}/{1}memory.pdf".format(save_path, filename_prefix), memory_methods(), tableau20, measure="PeakMemory")
+        graph(data, title("RSS growth"), "{0}/{1}rss.pdf".format(save_path, filename_prefix), memory_methods(), tableau20, measure="RSSDelta")
     
     
 def generate_graphs_by_density(path):
-    import os
-    import os.path
-    
     # These are the "Tableau 20" colors as RGB.
     tableau20 = [(174, 199, 232), (255, 127, 14), (31, 119, 180), (255, 187, 120),    
                  (44, 160, 44), (152, 223, 138), (214, 39, 40), (255, 152, 150),    
@@ -137,29 +286,27 @@ def generate_graphs_by_density(path):
         r, g, b = tableau20[i]    
         tableau20[i] = (r / 255., g / 255., b / 255.)
 
-    # Iterate over each subdir in path, and add any test-result file to the 
-    # data-frame df
-    dfs = []    
-    for dirpath, dirnames, filenames in os.walk(path):
-        for filename in [f for f in filenames if f.startswith("test-result")]:            
-            dfs.append(pd.read_csv(dirpath+"\\"+filename, sep='\t'))            
-    df = pd.concat(dfs)
+    # Summary of the test-result files in each subdir of path
+    df = update_summary(path)
 
-    kruskal_heap = ["kruskal_sorted1", "kruskal_sorted2","prim_2h_nx","prim_3h_nx","prim_binomial_nx","prim_fibonacci_nx"]        
+    kruskal_heap = ["kruskal_sorted1", "kruskal_sorted2","prim_2h_nx","prim_3h_nx","prim_binomial_nx","prim_fibonacci_nx","prim_pairing_nx","prim_bucket_nx"]        
 
     # Graph Prim (nx) methods, Prim and Kruskal -- all densities
     graph(df, "Edges", "{0}/edges.pdf".format(path), kruskal_heap, tableau20, variant="Edges", log=True)
+
+    # memory of the runs, against edges
+    if has_memory(df):
+        graph(df, "Peak memory", "{0}/edges-memory.pdf".format(path), memory_methods(), tableau20, variant="Edges", log=True, measure="PeakMemory")
+        graph(df, "RSS growth", "{0}/edges-rss.pdf".format(path), memory_methods(), tableau20, variant="Edges", measure="RSSDelta")
     
     # One graph for each density
-    for rank, v in enumerate(df.groupby(["Density"])):
+    os.makedirs(os.path.join(path, "Cruces"), exist_ok=True)
+    for rank, v in enumerate(df.groupby("Density")):
         density, group = v[0], v[1]
-        graph(group, "Density {0}".format(str(density)), "{0}/Cruces/{1}_pc.pdf".format(path,str(density)), kruskal_heap, tableau20, variant="Edges", log=True)
+        graph(group, "Density {0}".format(str(density)), os.path.join(path, "Cruces", "{0}_pc.pdf".format(density)), kruskal_heap, tableau20, variant="Edges", log=True)
         
         
 def graphX(path):
-    import os
-    import os.path
-    
     # These are the "Tableau 20" colors as RGB.
     tableau20 = [(174, 199, 232), (255, 127, 14), (31, 119, 180), (255, 187, 120),    
                  (44, 160, 44), (152, 223, 138), (214, 39, 40), (255, 152, 150),    
@@ -173,36 +320,29 @@ def graphX(path):
         r, g, b = tableau20[i]    
         tableau20[i] = (r / 255., g / 255., b / 255.)
 
-    # Iterate over each subdir in path, and add any test-result file to the 
-    # data-frame df
-    dfs = []
-    for dirpath, dirnames, filenames in os.walk(path):
-        for filename in [f for f in filenames if f.startswith("test-result")]:            
-            dfs.append(pd.read_csv(dirpath+"\\"+filename, sep='\t'))            
-    df = pd.concat(dfs)
+    # Summary of the test-result files in each subdir of path
+    df = update_summary(path)
 
-    kruskal_heap = ["kruskal_sorted1", "kruskal_sorted2","prim_2h_nx","prim_3h_nx","prim_binomial_nx","prim_fibonacci_nx"]        
+    kruskal_heap = ["kruskal_sorted1", "kruskal_sorted2","prim_2h_nx","prim_3h_nx","prim_binomial_nx","prim_fibonacci_nx","prim_pairing_nx","prim_bucket_nx"]        
 
     # Graph Prim (nx) methods, Prim and Kruskal -- all densities
     graph(df, "Edges", "{0}/edges.pdf".format(path), kruskal_heap, tableau20, variant="Edges", log=True)
+
+    # memory of the runs, against edges
+    if has_memory(df):
+        graph(df, "Peak memory", "{0}/edges-memory.pdf".format(path), memory_methods(), tableau20, variant="Edges", log=True, measure="PeakMemory")
+        graph(df, "RSS growth", "{0}/edges-rss.pdf".format(path), memory_methods(), tableau20, variant="Edges", measure="RSSDelta")
     
     # One graph for each density
-    for rank, v in enumerate(df.groupby(["Density"])):
+    for rank, v in enumerate(df.groupby("Density")):
         density, group = v[0], v[1]
         graph(group, "Density {0}".format(str(density)), "{0}/{1}-cruce-pk.pdf".format(path,str(density)), kruskal_heap, tableau20, variant="Edges", log=True)
         
-    # Graphs by number of edges
-    df_100 = df[df["File"].str.contains("graph_100_")]
-    df_1000 = df[df["File"].str.contains("graph_1000_")]
-    df_10000 = df[df["File"].str.contains("graph_10000_")]
-    df_100000 = df[df["File"].str.contains("graph_100000_")]
-    df_1000000 = df[df["File"].str.contains("graph_1000000_")]
-    
-    generate_graphs2(df_100, path, "100-")
-    generate_graphs2(df_1000, path, "1000-")
-    generate_graphs2(df_10000, path, "10000-")
-    generate_graphs2(df_100000, path, "100000-")   
-    generate_graphs2(df_1000000, path, "1000000-")
+    # Graphs by nominal number of edges (from the file names)
+    for size, group in df.groupby("Size"):
+        if size:
+            edges = ", ".join(str(e) for e in sorted(group["Edges"].unique()))
+            generate_graphs2(group, path, "{0}-".format(size), "{0} edges".format(edges))
     
     
     
@@ -0,0 +1,76 @@
+import json
+import sqlite3
+
+# Persistent store of the test results, in a SQLite file. Each run of a method
+# is keyed by the content of the graph (sha1 of the graph file), the algorithm
+# name, its implementation version (mst_registry), the measurement settings
+# of the test (warmup, gc, processes...) and the rep number, so a result
+# stays valid while the graph file and the implementation do not change,
+# whatever the name or location of the file, and it is only reused by a test
+# measured the same way. The measures of the run
+# (times, counters and mst checksum) are kept as a JSON object, so new result
+# columns need no change of the schema.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    graph TEXT NOT NULL,        -- sha1 of the graph file
+    algorithm TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    settings TEXT NOT NULL,     -- measurement settings, JSON
+    rep INTEGER NOT NULL,
+    file TEXT NOT NULL,         -- name of the file when it was tested
+    nodes INTEGER NOT NULL,
+    edges INTEGER NOT NULL,
+    density REAL NOT NULL,
+    measures TEXT NOT NULL,     -- JSON
+    PRIMARY KEY (graph, algorithm, version, settings, rep)
+)"""
+
+
+def settings_key(settings):
+    """ Text of the settings dictionary used in the key. """
+    return json.dumps(settings, sort_keys=True)
+
+
+class ResultStore:
+    """ Results of the tests, keyed by (graph, algorithm, version, settings,
+    rep). """
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(results)")]
+        if columns and "settings" not in columns:
+            # runs stored without their settings are kept apart, not reused
+            self.db.execute("ALTER TABLE results RENAME TO results_without_settings")
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def get(self, graph, algorithm, version, settings, rep):
+        """ Returns the graph properties (nodes, edges, density) and the
+        measures of a stored run, or None if the run is not stored. settings
+        is a dictionary of the measurement settings. """
+        row = self.db.execute("SELECT nodes, edges, density, measures FROM results "
+                              "WHERE graph = ? AND algorithm = ? AND version = ? AND settings = ? AND rep = ?",
+                              (graph, algorithm, version, settings_key(settings), rep)).fetchone()
+        if row is None:
+            return None
+        return (row[0], row[1], row[2]), json.loads(row[3])
+
+    def put(self, graph, algorithm, version, settings, rep, file, props, measures):
+        """ Stores (or replaces) the measures of a run. """
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (graph, algorithm, version, settings_key(settings), rep, file,
+                         props[0], props[1], props[2], json.dumps(measures)))
+        self.db.commit()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
@@ -1,22 +1,70 @@
+import hashlib
 import math
-import random as rnd
+import multiprocessing
+import os
+import numpy as np
+import graph_io
 from argparse import ArgumentParser   # Command line argument parser
 
+# Generador de grafos de prueba. Los arcos se generan con NumPy como arreglos
+# u, v (nodos 1..n) y w (pesos enteros 1..10), y se escriben en bloques. Todas
+# las familias usan un generador de números aleatorios con semilla (--seed),
+# de modo que un mismo corpus se puede volver a generar.
+#
+# Con --edges se genera un corpus completo (cada m, y cada densidad de la
+# serie) en --jobs procesos; cada grafo tiene su propia semilla, derivada de
+# --seed. Los grafos generados se anotan en el manifiesto del directorio
+# (graph_io.MANIFEST), que aycc usa para encontrar el corpus.
+
+CHUNK = 2**16 # arcos por bloque de escritura
+MAX_WEIGHT = 10
+
+FAMILIES = ["density", "gnm", "grid", "geometric", "powerlaw"]
+
+DENSITIES = [round(x/10,1) for x in range(10, 2, -1)]
+
 
 def density(n, m):
     return math.ceil(10 * (2*m) / (n * (n-1))) / 10
 
-def save_graph_to_file(g, n, ne, path):
+def write_edgelist(file_path, n, u, v, w, d, binary=False):
+    """ Escribe los arcos (u, v, w) en file_path, en bloques de CHUNK arcos.
+    Con binary también escribe el cache binario de graph_io, de modo que aycc
+    no necesita leer el texto. Devuelve la fila del manifiesto del grafo (sin
+    la semilla). """
+    m = len(u)
+    checksum = hashlib.sha1()
+    with open(file_path, 'w', buffering=2**20) as fp:
+        def write(text):
+            fp.write(text)
+            checksum.update(text.encode())
+        write('# Numero de nodos: ' + str(n) + '\n')
+        write('# Numero de arcos: ' + str(m) + '\n')
+        write('# Densidad: ' + d + '\n')
+        for start in range(0, m, CHUNK):
+            end = min(start + CHUNK, m)
+            rows = np.column_stack((u[start:end], v[start:end], w[start:end]))
+            write(('%d %d %d\n' * (end - start)) % tuple(rows.ravel().tolist()))
+
+    if binary:
+        edges = np.empty(m, dtype=graph_io.EDGE_DTYPE)
+        edges['u'] = u
+        edges['v'] = v
+        edges['weight'] = w
+        header = {"nodes": n, "edges": m, "density": float(d)}
+        graph_io.save_cache(graph_io.EdgeList(file_path, edges, header))
+
+    return {"File": os.path.basename(file_path), "Nodes": n, "Edges": m,
+            "Density": d, "Checksum": checksum.hexdigest()}
+
+def save_graph_to_file(g, n, ne, path, binary=False):
     # Calcula la densidad
     d = density(n, ne)
 
     # Almacena en archivo
-    fp = open(path + '/graph_'+str(ne)+'_'+"{:.1f}".format(d)+'.edgelist', 'w')
-    fp.write('# Numero de nodos: ' + str(n) + '\n')
-    fp.write('# Numero de arcos: ' + str(ne) + '\n')
-    fp.write('# Densidad: ' + "{:.1f}".format(d) + '\n')
-    fp.write('\n'.join('{} {} {}'.format(x[0],x[1],x[2]) for x in g))
-    fp.close()
+    g = np.asarray(g, dtype=np.int64).reshape(-1, 3)
+    file_path = path + '/graph_'+str(ne)+'_'+"{:.1f}".format(d)+'.edgelist'
+    return write_edgelist(file_path, n, g[:, 0], g[:, 1], g[:, 2], "{:.1f}".format(d), binary)
 
 # n (numero de nodos) dado m (numero de arco) y d (densidad).
 def cant_nodos(m, d):
@@ -24,54 +72,218 @@ def cant_nodos(m, d):
     n = (1 + math.sqrt(disc)) / 2
     return math.ceil(n)
 
-def gen_complete_graph(n):
-    rs = []
-    for i in range(1, n):
-        for j in range(i+1, n+1):
-            w = rnd.randint(1, 10)
-            rs.append((i, j, w))
-    return rs
+def random_weights(rng, m):
+    return rng.integers(1, MAX_WEIGHT + 1, m)
+
+def complete_edges(n):
+    # Arcos (i, j), i < j, en el mismo orden que gen_complete_graph.
+    u, v = np.triu_indices(n, 1)
+    return u + 1, v + 1
+
+def gen_complete_graph(n, rng=None):
+    rng = rng or np.random.default_rng()
+    u, v = complete_edges(n)
+    w = random_weights(rng, len(u))
+    return list(zip(u.tolist(), v.tolist(), w.tolist()))
+
+def density_edges(m, n):
+    # Arcos del grafo de la serie de m arcos con n nodos: el grafo completo con
+    # la menor cantidad de nodos p, donde al pasar de p a p+1 nodos el arco p-1
+    # se reconecta al nodo p+1.
+    p = cant_nodos(m, 1.0)
+    u, v = complete_edges(p)
+    v[p - 1:n - 1] = np.arange(p + 1, n + 1)
+    return u, v
+
+def gen_density_graph(m, d, save_path, rng, binary=False):
+    """ Genera el grafo de la serie de m arcos con densidad d. """
+    n = cant_nodos(m, d)
+    u, v = density_edges(m, n)
+    w = random_weights(rng, len(u))
+    dt = "{:.1f}".format(density(n, m))
+    file_path = save_path + '/graph_'+str(m)+'_'+dt+'.edgelist'
+    return write_edgelist(file_path, n, u, v, w, dt, binary)
 
 # Genera una secuencia de grafos para un m (cant. arcos) fija
-# y una d (densidad) variable cada ds=0.1 pasos.
-def gen_graph_seq(m, save_path):
-    d = [round(x/10,1) for x in range(10, 2, -1)]
-    n = list(map(cant_nodos, [m]*len(d), d))
-    mt = len(n)
+# y una d (densidad) variable cada ds=0.1 pasos. Todos los grafos de la
+# secuencia comparten los pesos de los arcos.
+def gen_graph_seq(m, save_path, rng=None, binary=False):
+    rng = rng or np.random.default_rng()
+    w = random_weights(rng, len(complete_edges(cant_nodos(m, 1.0))[0]))
+
+    rows = []
+    for d in DENSITIES:
+        n = cant_nodos(m, d)
+        u, v = density_edges(m, n)
+        # Almacena los grafos intermedios segun criterio.
+        dt = "{:.1f}".format(density(n, m))
+        file_path = save_path + '/graph_'+str(m)+'_'+dt+'.edgelist'
+        rows.append(write_edgelist(file_path, n, u, v, w, dt, binary))
+    return rows
+
+def sample_pairs(rng, n, m, draw):
+    """ Elige m pares distintos (u, v), u < v, de nodos 0..n-1. draw(k) sortea
+    k pares (con repeticiones y lazos, que se descartan). """
+    if m > n * (n - 1) // 2:
+        raise ValueError("{0} edges do not fit in a graph of {1} nodes".format(m, n))
+    keys = np.zeros(0, dtype=np.int64)
+    for _ in range(100):
+        k = m - len(keys)
+        if k <= 0:
+            break
+        a, b = draw(k + k // 4 + 16)
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        keys = np.unique(np.concatenate((keys, (lo * n + hi)[lo != hi])))
+    if len(keys) < m:
+        raise ValueError("could not sample {0} distinct edges on {1} nodes".format(m, n))
+    keys = rng.permutation(keys)[:m]
+    return keys // n, keys % n
+
+def gen_gnm(n, m, rng):
+    """ Grafo aleatorio G(n, m) de Erdős–Rényi. """
+    total = n * (n - 1) // 2
+    if 2 * m > total:
+        # grafo denso: se eligen m de todos los pares
+        u, v = np.triu_indices(n, 1)
+        pick = rng.choice(total, m, replace=False)
+        return u[pick], v[pick]
+    return sample_pairs(rng, n, m, lambda k: (rng.integers(0, n, k), rng.integers(0, n, k)))
+
+def gen_grid(m):
+    """ Grilla cuadrada k x k, con el menor k que tiene al menos m arcos. """
+    k = 2
+    while 2 * k * (k - 1) < m:
+        k += 1
+    ids = np.arange(k * k).reshape(k, k)
+    u = np.concatenate((ids[:, :-1].ravel(), ids[:-1, :].ravel()))
+    v = np.concatenate((ids[:, 1:].ravel(), ids[1:, :].ravel()))
+    return k * k, u, v
 
-    p = n[0] # Cantidad de nodos del grafo
-    g = gen_complete_graph(p) # Genera un grafo completo con la menor cantidad de nodos.
+def gen_geometric(n, m, rng):
+    """ Grafo geométrico aleatorio: n puntos en el cuadrado unitario, unidos
+    los m pares más cercanos. """
+    if m > n * (n - 1) // 2:
+        raise ValueError("{0} edges do not fit in a graph of {1} nodes".format(m, n))
+    x = np.sort(rng.random(n))
+    y = rng.random(n)
+    # radio con unos 2m pares esperados (sin contar el borde)
+    r = math.sqrt(4 * m / (math.pi * n * n))
+    while True:
+        a, b, dist = [], [], []
+        for k in range(1, n):
+            # x está ordenado: x[i+k] - x[i] crece con k
+            dx = x[k:] - x[:-k]
+            if dx.min() > r:
+                break
+            d2 = dx * dx + (y[k:] - y[:-k]) ** 2
+            near = np.flatnonzero(d2 <= r * r)
+            a.append(near)
+            b.append(near + k)
+            dist.append(d2[near])
+        if sum(len(d) for d in dist) >= m:
+            break
+        r *= 1.5
+    a, b, dist = np.concatenate(a), np.concatenate(b), np.concatenate(dist)
+    keep = np.argpartition(dist, m - 1)[:m] if m < len(dist) else np.arange(len(dist))
+    # etiquetas al azar, para no seguir el orden en x
+    labels = rng.permutation(n)
+    return labels[a[keep]], labels[b[keep]]
 
-    t = 0
-    while t < mt:
+def gen_powerlaw(n, m, rng, exponent=2.5):
+    """ Grafo de Chung-Lu con grados esperados según una ley de potencia de
+    exponente exponent. """
+    weight = np.arange(1, n + 1) ** (-1.0 / (exponent - 1))
+    p = weight / weight.sum()
+    return sample_pairs(rng, n, m, lambda k: (rng.choice(n, k, p=p), rng.choice(n, k, p=p)))
 
-        if p == n[t]:
-            # Almacena los grafos intermedios segun criterio.
-            save_graph_to_file(g, p, m, path=save_path)
-            t += 1
+def gen_family(family, m, n, save_path, rng, binary=False):
+    """ Genera un grafo de la familia dada con m arcos y n nodos (grid elige
+    su propia cantidad de nodos). """
+    if family == "gnm":
+        u, v = gen_gnm(n, m, rng)
+    elif family == "grid":
+        n, u, v = gen_grid(m)
+    elif family == "geometric":
+        u, v = gen_geometric(n, m, rng)
+    elif family == "powerlaw":
+        u, v = gen_powerlaw(n, m, rng)
+    else:
+        raise ValueError("Unknown graph family: {0}".format(family))
+    w = random_weights(rng, len(u))
+    d = 2 * len(u) / (n * (n - 1))
+    file_path = save_path + '/' + family + '_' + str(len(u)) + '_' + str(n) + '.edgelist'
+    return write_edgelist(file_path, n, u + 1, v + 1, w, "{:.4g}".format(d), binary)
 
-        e = g[p - 1]
-        g[p - 1] = (e[0], p + 1, e[2])
-        p += 1
+def corpus_tasks(args, seed_seq):
+    """ Tareas (familia, m, densidad, n, semilla, ...) del corpus: cada m de
+    --edges, con cada densidad de la serie (o la dada por --nodes/--density
+    para las otras familias). Cada tarea recibe una semilla propia. """
+    tasks = []
+    for m in args.edges:
+        if args.family == "density":
+            tasks.extend(("density", m, d, 0) for d in DENSITIES)
+        else:
+            tasks.append((args.family, m, args.density, args.nodes or cant_nodos(m, args.density)))
+    seeds = [int(s.generate_state(1, np.uint64)[0]) for s in seed_seq.spawn(len(tasks))]
+    return [task + (seed, args.graphpath, args.binary) for task, seed in zip(tasks, seeds)]
 
-    return g
+def gen_task(task):
+    """ Genera el grafo de una tarea de corpus_tasks. Devuelve su fila del
+    manifiesto. """
+    family, m, d, n, seed, save_path, binary = task
+    rng = np.random.default_rng(seed)
+    if family == "density":
+        row = gen_density_graph(m, d, save_path, rng, binary)
+    else:
+        row = gen_family(family, m, n, save_path, rng, binary)
+    row["Seed"] = seed
+    return row
 
 
 def get_args():
-    """ Parse arguments from the command line """    
+    """ Parse arguments from the command line """
     parser = ArgumentParser()
-    parser.add_argument("numedges", help="Number of edges to generate", type=int)
-    parser.add_argument("--graphpath", help="Save directory", default=".", type=str)    
-    return parser.parse_args()
-    
-    
+    parser.add_argument("numedges", help="Number of edges to generate", nargs="?", default=None, type=int)
+    parser.add_argument("--edges", help="Comma separated list of numbers of edges (corpus mode)", default="", type=str)
+    parser.add_argument("--jobs", help="Number of worker processes (corpus mode)", default=1, type=int)
+    parser.add_argument("--graphpath", help="Save directory", default=".", type=str)
+    parser.add_argument("--seed", help="Seed of the random generator (default: random)", default=None, type=int)
+    parser.add_argument("--family", help="Graph family (density: series of densities 1.0 to 0.3)", choices=FAMILIES, default="density")
+    parser.add_argument("--nodes", help="Number of nodes (default: given by --density)", default=0, type=int)
+    parser.add_argument("--density", help="Density used to choose the number of nodes", default=0.1, type=float)
+    parser.add_argument("--binary", help="Also write the binary cache of each graph", action="store_true")
+    args = parser.parse_args()
+    args.edges = [int(m) for m in args.edges.split(",") if m]
+    if args.numedges is None and not args.edges:
+        parser.error("give the number of edges or --edges")
+    return args
+
+
 def main():
     args = get_args()
-    
-    print("Generando...")
-    gen_graph_seq(args.numedges, args.graphpath)
+    seed_seq = np.random.SeedSequence(args.seed)
+
+    print("Generando... (semilla {0})".format(seed_seq.entropy))
+    if args.edges:
+        tasks = corpus_tasks(args, seed_seq)
+        if args.jobs > 1:
+            with multiprocessing.Pool(args.jobs) as pool:
+                rows = pool.map(gen_task, tasks, chunksize=1)
+        else:
+            rows = list(map(gen_task, tasks))
+    else:
+        seed = int(seed_seq.generate_state(1, np.uint64)[0])
+        rng = np.random.default_rng(seed)
+        if args.family == "density":
+            rows = gen_graph_seq(args.numedges, args.graphpath, rng, args.binary)
+        else:
+            n = args.nodes or cant_nodos(args.numedges, args.density)
+            rows = [gen_family(args.family, args.numedges, n, args.graphpath, rng, args.binary)]
+        for row in rows:
+            row["Seed"] = seed
+    graph_io.update_manifest(args.graphpath, rows)
     print("Generación finalizada.")
-    
+
 
 if __name__ == '__main__':
     main()
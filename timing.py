@@ -0,0 +1,168 @@
+import gc
+import os
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Measurement layer of the tests. A run is timed with perf_counter_ns (wall
+# time) and process_time_ns (CPU time), optionally with the garbage collector
+# disabled. The code being measured can mark its phases with
+#
+#   with timing.phase("sort"):
+#       ...
+#
+# which is recorded by the PhaseTimer of the running measure, and does nothing
+# outside of one. Counters of the run (e.g. edges examined) are reported the
+# same way with timing.record(name, value).
+#
+# The memory of a run is measured apart (memory()), in a run that is not timed,
+# as tracemalloc slows down the allocations.
+
+_active = [] # stack of the active PhaseTimers
+
+
+class PhaseTimer:
+    """ Accumulates the time (ns) spent in each named phase, and the counters
+    recorded by the code. """
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.counters = OrderedDict()
+
+    def add(self, name, ns):
+        self.phases[name] = self.phases.get(name, 0) + ns
+
+    @contextmanager
+    def active(self):
+        """ Makes this timer the target of phase() while in the block. """
+        _active.append(self)
+        try:
+            yield self
+        finally:
+            _active.pop()
+
+
+def record(name, value):
+    """ Adds value to a counter of the active PhaseTimer, if there is one. """
+    if _active:
+        counters = _active[-1].counters
+        counters[name] = counters.get(name, 0) + value
+
+
+@contextmanager
+def phase(name):
+    """ Times a phase of the active PhaseTimer, if there is one. """
+    if not _active:
+        yield
+        return
+    timer = _active[-1]
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter_ns() - start)
+
+
+class Sample:
+    """ Result of a measure: wall and CPU time and time per phase, in ns, and
+    the counters recorded. """
+    def __init__(self, wall_ns, cpu_ns, phases, counters=None):
+        self.wall_ns = wall_ns
+        self.cpu_ns = cpu_ns
+        self.phases = phases
+        self.counters = counters or {}
+
+    @property
+    def wall(self):
+        """ Wall time in secs. """
+        return self.wall_ns / 1e9
+
+    @property
+    def cpu(self):
+        """ CPU time in secs. """
+        return self.cpu_ns / 1e9
+
+    def phase(self, name):
+        """ Time of a phase in secs, or nan if the phase was not run. """
+        return self.phases[name] / 1e9 if name in self.phases else float("nan")
+
+    def counter(self, name):
+        """ Value of a counter, or nan if it was not recorded. """
+        return self.counters.get(name, float("nan"))
+
+
+def measure(func, setup=None, warmup=0, disable_gc=False):
+    """ Times func(*setup()). setup builds the arguments of each run and is not
+    timed. The timed run is preceded by warmup untimed runs. With disable_gc
+    the garbage is collected first and the collector is off while timing.
+    Returns the result of func and the Sample. """
+    for _ in range(warmup):
+        func(*(setup() if setup else ()))
+
+    args = setup() if setup else ()
+    gc_enabled = gc.isenabled()
+    if disable_gc:
+        gc.collect()
+        gc.disable()
+    timer = PhaseTimer()
+    try:
+        with timer.active():
+            wall = time.perf_counter_ns()
+            cpu = time.process_time_ns()
+            result = func(*args)
+            cpu = time.process_time_ns() - cpu
+            wall = time.perf_counter_ns() - wall
+    finally:
+        if disable_gc and gc_enabled:
+            gc.enable()
+    return result, Sample(wall, cpu, timer.phases, timer.counters)
+
+
+def rss():
+    """ Resident set size of the process in bytes, or nan where
+    /proc/self/statm is not available. """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return float("nan")
+
+
+def memory(func, setup=None):
+    """ Runs func(*setup()) with tracemalloc on. setup is not measured.
+    Returns the result of func, the peak of the memory traced during the run
+    and the growth of the resident set size of the process (bytes). """
+    args = setup() if setup else ()
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    start = rss()
+    try:
+        result = func(*args)
+        delta = rss() - start
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return result, peak, delta
+
+
+def percentile(values, q):
+    """ q-th percentile (0..100) of sorted values, by linear interpolation. """
+    pos = (len(values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def summarize(values):
+    """ Returns (samples, min, median, IQR) of values, ignoring nan. """
+    values = sorted(v for v in values if v == v)
+    if not values:
+        nan = float("nan")
+        return 0, nan, nan, nan
+    return (len(values), values[0], percentile(values, 50),
+            percentile(values, 75) - percentile(values, 25))